@@ -7,32 +7,53 @@ Load Generator for Sync vs Async API Performance Testing
 import asyncio
 import aiohttp
 import click
-import json
+import functools
+import math
+import numpy as np
+import orjson
 import time
-import statistics
 import os
+import sys
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, asdict
+from enum import IntEnum
 import uuid
 from aiohttp import web
 
+try:
+    from hdrh.histogram import HdrHistogram  # Optional: bounded-memory percentiles for very large runs
+except ImportError:
+    HdrHistogram = None
 
-@dataclass
+try:
+    from tdigest import TDigest  # Optional: streaming, mergeable percentile sketch (~KBs regardless of N)
+except ImportError:
+    TDigest = None
+
+# Sample count at which LatencyRecorder switches from raw buffers to a bounded-memory sketch
+HISTOGRAM_THRESHOLD = 10_000
+
+
+class Endpoint(IntEnum):
+    """Endpoint a request was sent to (integer tag keeps hot-loop comparisons cheap)"""
+    SYNC = 0
+    ASYNC = 1
+
+
+@dataclass(slots=True)
 class RequestResult:
     """Result of a single request"""
     request_id: str
-    endpoint: str  # 'sync' or 'async'
+    endpoint: Endpoint
     success: bool
     latency_ms: float
     status_code: int
     error_message: Optional[str] = None
-    callback_received: bool = False
-    callback_latency_ms: Optional[float] = None
     rate_limited: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class LoadTestStats:
     """Statistics from load test run"""
     total_requests: int
@@ -57,12 +78,115 @@ class LoadTestStats:
     callback_latency_p99: float
 
 
+class LatencyRecorder:
+    """
+    Collects latency samples (ms) and answers percentile, mean and variance queries.
+    
+    Small runs (or keep_samples=True) keep every sample in a preallocated float64 array and use
+    numpy. Runs expected to reach HISTOGRAM_THRESHOLD samples stream into a t-digest when the
+    tdigest package is installed, else into a fixed-size HdrHistogram (microsecond resolution,
+    1us-60s range) when hdrh is installed. The t-digest backend tracks mean and variance with
+    Welford's running update since the sketch does not keep them.
+    """
+    
+    def __init__(self, expected_samples: int = 0, keep_samples: bool = False):
+        self._digest = None
+        self._histogram = None
+        self._samples = None
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        streaming = not keep_samples and expected_samples >= HISTOGRAM_THRESHOLD
+        if streaming and TDigest is not None:
+            self._digest = TDigest()
+        elif streaming and HdrHistogram is not None:
+            self._histogram = HdrHistogram(1, 60_000_000, 3)
+        else:
+            self._samples = np.empty(max(expected_samples, 16), dtype=np.float64)
+    
+    @property
+    def size(self) -> int:
+        if self._histogram is not None:
+            return self._histogram.get_total_count()
+        return self._count
+    
+    @property
+    def keeps_samples(self) -> bool:
+        return self._samples is not None
+    
+    def samples(self) -> np.ndarray:
+        """Recorded samples in milliseconds (only available on the raw-buffer backend)"""
+        if self._samples is None:
+            raise ValueError("Raw samples are not retained by the streaming backends")
+        return self._filled()
+    
+    def _filled(self) -> np.ndarray:
+        """View of the recorded part of the sample buffer"""
+        return self._samples[:self._count]
+    
+    def record(self, latency_ms: float):
+        """Record a single latency sample in milliseconds"""
+        if self._digest is not None:
+            self._digest.update(latency_ms)
+            self._count += 1
+            delta = latency_ms - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (latency_ms - self._mean)
+            return
+        if self._histogram is not None:
+            self._histogram.record_value(min(int(latency_ms * 1000), 60_000_000))
+            return
+        if self._count == self._samples.size:
+            self._samples = np.resize(self._samples, self._samples.size * 2)
+        self._samples[self._count] = latency_ms
+        self._count += 1
+    
+    def percentiles(self, quantiles: List[float]) -> List[float]:
+        """Return the requested percentiles in milliseconds (zeros when empty)"""
+        if not self.size:
+            return [0.0] * len(quantiles)
+        if self._digest is not None:
+            return [float(self._digest.percentile(q)) for q in quantiles]
+        if self._histogram is not None:
+            return [self._histogram.get_value_at_percentile(q) / 1000.0 for q in quantiles]
+        return np.percentile(self._filled(), quantiles, method='lower').tolist()
+    
+    def mean(self) -> float:
+        if not self.size:
+            return 0.0
+        if self._digest is not None:
+            return self._mean
+        if self._histogram is not None:
+            return self._histogram.get_mean_value() / 1000.0
+        return float(self._filled().mean())
+    
+    def variance(self) -> float:
+        """Sample variance (ddof=1) in ms^2, 0 with fewer than two samples"""
+        count = self.size
+        if count < 2:
+            return 0.0
+        if self._digest is not None:
+            return self._m2 / (count - 1)
+        if self._histogram is not None:
+            stddev_ms = self._histogram.get_stddev() / 1000.0
+            return stddev_ms * stddev_ms * count / (count - 1)
+        return float(self._filled().var(ddof=1))
+
+
+@functools.lru_cache(maxsize=1000)
+def _seed_fields(seed: int) -> tuple:
+    """Build the deterministic (user_id, values) pair for a payload seed"""
+    return f"user_{seed}", tuple(float(seed + i) for i in range(1, 6))
+
+
 class CallbackServer:
     """Simple HTTP server to receive async callbacks"""
     
     def __init__(self, port: int = 8080):
         self.port = port
-        self.received_callbacks: Dict[str, float] = {}  # request_id -> timestamp
+        self.received_callbacks: Dict[str, float] = {}  # request_id -> perf_counter() timestamp
+        self.expected_callbacks = 0
+        self.all_callbacks_received = asyncio.Event()
         self.app = None
         self.runner = None
         
@@ -85,35 +209,44 @@ class CallbackServer:
         if self.runner:
             await self.runner.cleanup()
     
+    def expect_callbacks(self, count: int):
+        """Set how many callbacks to wait for, signalling at once if they are already in"""
+        self.expected_callbacks = count
+        if len(self.received_callbacks) >= count:
+            self.all_callbacks_received.set()
+    
     async def handle_callback(self, request):
         """Handle incoming callback requests"""
+        received_at = time.perf_counter()
         try:
-            data = await request.json()
-            request_id = data.get('request_id')
+            # The API sends the request ID as a header; only parse the body when it is missing
+            request_id = request.headers.get('X-Request-Id')
+            if not request_id:
+                request_id = orjson.loads(await request.read()).get('request_id')
             
             if request_id:
-                self.received_callbacks[request_id] = time.time()
-                # Success response for demo mode
-                return web.json_response({"status": "received", "request_id": request_id})
-            else:
-                return web.json_response({"status": "received", "message": "No request_id provided"})
+                self.received_callbacks[request_id] = received_at
+                if self.expected_callbacks and len(self.received_callbacks) >= self.expected_callbacks:
+                    self.all_callbacks_received.set()
             
         except Exception as e:
             print(f"Error handling callback: {e}")
-            # Still return success to avoid breaking the load test
-            return web.json_response({"status": "error", "error": str(e)})
+        
+        # Always acknowledge with an empty 200 (the API only treats 200 as delivered)
+        return web.Response(status=200)
 
 
 class LoadGenerator:
     """Dual-mode load generator: Demo mode for performance differentiation, Production mode for security compliance"""
     
     def __init__(self, base_url: str, callback_server: CallbackServer, 
-                 demo_mode: bool = False, production_mode: bool = False):
+                 demo_mode: bool = False, production_mode: bool = False,
+                 dump_samples: bool = False):
         self.base_url = base_url
         self.callback_server = callback_server
-        self.results: List[RequestResult] = []
         self.demo_mode = demo_mode
         self.production_mode = production_mode
+        self.dump_samples = dump_samples  # Keep raw latency samples for the output file
         
         # Mode-specific configuration
         if demo_mode:
@@ -132,12 +265,63 @@ class LoadGenerator:
             self.use_external_callback = False
             self.max_concurrency = 20
             self.max_requests = 500
+        
+        # Shared per-request timeout and headers (built once, reused by every request)
+        self.request_timeout = aiohttp.ClientTimeout(total=30)
+        self.json_headers = {'Content-Type': 'application/json'}
+        
+        # Per-run constants hoisted out of the send path
+        self.sync_url = f"{base_url}/sync"
+        self.async_url = f"{base_url}/async"
+        self.callback_url = self._get_callback_url()
+        self.external_callback = self._is_external_callback()
+        self.complexity = 1  # Set (capped) by run_load_test
+        
+        # Per-run counters and latency recorders, reset by run_load_test and filled as requests complete
+        self._reset_run_state(0)
+    
+    def _reset_run_state(self, total_requests: int):
+        """Size fresh recorders for a run of total_requests and zero the counters"""
+        self.total_requests = total_requests
+        self.successful_requests = 0
+        self.callbacks_received = 0
+        self.rate_limited_requests = 0
+        self._sync_latencies = LatencyRecorder(total_requests, self.dump_samples)
+        self._async_latencies = LatencyRecorder(total_requests, self.dump_samples)
+        self._callback_latencies = LatencyRecorder(total_requests, self.dump_samples)
+        # IDs of accepted async requests, kept only to match local callbacks against
+        self._pending_callback_ids: List[str] = []
+    
+    def _record_result(self, result: RequestResult):
+        """Count a completed request and record its latency
+        
+        Results are not retained, so memory stays bounded by the recorders on large runs.
+        """
+        if result.rate_limited:
+            self.rate_limited_requests += 1
+        if not result.success:
+            return
+        self.successful_requests += 1
+        if result.endpoint is Endpoint.SYNC:
+            self._sync_latencies.record(result.latency_ms)
+            return
+        self._async_latencies.record(result.latency_ms)
+        if self.external_callback:
+            # httpbin.org never calls back: simulate completion as acceptance plus ~150ms processing
+            self.callbacks_received += 1
+            self._callback_latencies.record(result.latency_ms + 150.0)
+        else:
+            self._pending_callback_ids.append(result.request_id)
     
     def _get_callback_url(self) -> str:
         """Get appropriate callback URL based on mode"""
         # Use httpbin.org for both demo and production - it's reliable and external
         return "https://httpbin.org/post"
     
+    def _is_external_callback(self) -> bool:
+        """Whether callbacks go to an external endpoint rather than the local callback server"""
+        return not self.callback_url.startswith('http://localhost')
+    
     def _validate_test_parameters(self, requests: int, concurrency: int) -> tuple[int, int]:
         """Validate and adjust test parameters based on mode"""
         if self.demo_mode:
@@ -163,53 +347,51 @@ class LoadGenerator:
             # Default mode: Moderate limits
             return min(requests, self.max_requests), min(concurrency, self.max_concurrency)
     
-    async def generate_test_data(self, request_id: str) -> Dict[str, Any]:
+    def generate_test_data(self, request_id: str) -> Dict[str, Any]:
         """Generate valid test data that passes enhanced validation"""
         # Use dictionary format as expected by the API model
-        seed = hash(request_id) % 1000
+        user_id, values = _seed_fields(hash(request_id) % 1000)
         return {
-            "user_id": f"user_{seed}",
+            "user_id": user_id,
             "operation": "load_test",
-            "values": [float(seed + i) for i in range(1, 6)],
+            "values": values,
             "timestamp": request_id
         }
     
-    async def send_sync_request(self, session: aiohttp.ClientSession, request_id: str, 
-                               complexity: int = 1) -> RequestResult:
+    async def send_sync_request(self, session: aiohttp.ClientSession, request_id: str) -> RequestResult:
         """Send a synchronous request with production security awareness"""
-        test_data = await self.generate_test_data(request_id)
-        
         payload = {
-            "data": test_data,
-            "complexity": min(complexity, 10)  # Cap complexity to avoid rejection
+            "data": self.generate_test_data(request_id),
+            "complexity": self.complexity
         }
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             async with session.post(
-                f"{self.base_url}/sync",
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=30)
+                self.sync_url,
+                data=orjson.dumps(payload),
+                headers=self.json_headers,
+                timeout=self.request_timeout
             ) as response:
-                end_time = time.time()
+                end_time = time.perf_counter()
                 latency_ms = (end_time - start_time) * 1000
                 
                 if response.status == 200:
-                    await response.json()  # Consume response
+                    await response.read()  # Drain body so the connection returns to the pool
                     return RequestResult(
                         request_id=request_id,
-                        endpoint='sync',
+                        endpoint=Endpoint.SYNC,
                         success=True,
                         latency_ms=latency_ms,
                         status_code=response.status
                     )
                 elif response.status == 429:
                     # Rate limited
-                    error_data = await response.json()
+                    await response.read()
                     return RequestResult(
                         request_id=request_id,
-                        endpoint='sync',
+                        endpoint=Endpoint.SYNC,
                         success=False,
                         latency_ms=latency_ms,
                         status_code=response.status,
@@ -217,10 +399,10 @@ class LoadGenerator:
                         rate_limited=True
                     )
                 else:
-                    error_text = await response.text()
+                    error_text = (await response.content.read(512)).decode('utf-8', 'replace')
                     return RequestResult(
                         request_id=request_id,
-                        endpoint='sync',
+                        endpoint=Endpoint.SYNC,
                         success=False,
                         latency_ms=latency_ms,
                         status_code=response.status,
@@ -228,56 +410,52 @@ class LoadGenerator:
                     )
                     
         except Exception as e:
-            end_time = time.time()
+            end_time = time.perf_counter()
             latency_ms = (end_time - start_time) * 1000
             
             return RequestResult(
                 request_id=request_id,
-                endpoint='sync',
+                endpoint=Endpoint.SYNC,
                 success=False,
                 latency_ms=latency_ms,
                 status_code=0,
                 error_message=str(e)
             )
     
-    async def send_async_request(self, session: aiohttp.ClientSession, request_id: str,
-                               complexity: int = 1) -> RequestResult:
+    async def send_async_request(self, session: aiohttp.ClientSession, request_id: str) -> RequestResult:
         """Send an asynchronous request with production security awareness"""
-        test_data = await self.generate_test_data(request_id)
-        
-        callback_url = self._get_callback_url()
-        
         payload = {
-            "data": test_data,
-            "complexity": min(complexity, 10),  # Cap complexity to avoid rejection
-            "callback_url": callback_url
+            "data": self.generate_test_data(request_id),
+            "complexity": self.complexity,
+            "callback_url": self.callback_url
         }
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             async with session.post(
-                f"{self.base_url}/async",
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=30)
+                self.async_url,
+                data=orjson.dumps(payload),
+                headers=self.json_headers,
+                timeout=self.request_timeout
             ) as response:
-                end_time = time.time()
+                end_time = time.perf_counter()
                 latency_ms = (end_time - start_time) * 1000
                 
                 if response.status == 200:
-                    await response.json()  # Consume response
+                    await response.read()  # Drain body so the connection returns to the pool
                     return RequestResult(
                         request_id=request_id,
-                        endpoint='async',
+                        endpoint=Endpoint.ASYNC,
                         success=True,
                         latency_ms=latency_ms,
                         status_code=response.status
                     )
                 else:
-                    error_text = await response.text()
+                    error_text = (await response.content.read(512)).decode('utf-8', 'replace')
                     return RequestResult(
                         request_id=request_id,
-                        endpoint='async',
+                        endpoint=Endpoint.ASYNC,
                         success=False,
                         latency_ms=latency_ms,
                         status_code=response.status,
@@ -285,12 +463,12 @@ class LoadGenerator:
                     )
                     
         except Exception as e:
-            end_time = time.time()
+            end_time = time.perf_counter()
             latency_ms = (end_time - start_time) * 1000
             
             return RequestResult(
                 request_id=request_id,
-                endpoint='async',
+                endpoint=Endpoint.ASYNC,
                 success=False,
                 latency_ms=latency_ms,
                 status_code=0,
@@ -303,6 +481,7 @@ class LoadGenerator:
         
         # Validate and adjust parameters based on mode
         total_requests, concurrency = self._validate_test_parameters(total_requests, concurrency)
+        self.complexity = min(complexity, 10)  # Cap complexity to avoid rejection
         
         if self.demo_mode:
             print(f"🎭 DEMO MODE: Optimized to show sync vs async performance differences")
@@ -321,103 +500,102 @@ class LoadGenerator:
         
         print(f"\n🚀 Starting load test: {total_requests} requests, {concurrency} concurrent, {sync_ratio*100}% sync")
         
-        start_time = time.time()
-        
-        # Create semaphore to limit concurrency
-        semaphore = asyncio.Semaphore(concurrency)
-        
-        async def limited_request(endpoint_type: str, request_id: str):
-            async with semaphore:
+        start_time = time.perf_counter()
+        
+        # Generate requests: one urandom read for all IDs, sync/async split by index
+        raw_ids = os.urandom(16 * total_requests)
+        request_ids = [
+            str(uuid.UUID(bytes=raw_ids[i * 16:(i + 1) * 16], version=4))
+            for i in range(total_requests)
+        ]
+        sync_count = min(math.ceil(total_requests * sync_ratio), total_requests)
+        
+        # Queue all requests up front; a fixed pool of workers drains the queue
+        queue: asyncio.Queue = asyncio.Queue()
+        for idx, rid in enumerate(request_ids):
+            queue.put_nowait((Endpoint.SYNC if idx < sync_count else Endpoint.ASYNC, rid))
+        
+        self._reset_run_state(total_requests)
+        
+        async def worker(session: aiohttp.ClientSession):
+            while True:
+                try:
+                    endpoint, request_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
                 # Add delay between requests based on mode
                 if self.request_delay > 0:
                     await asyncio.sleep(self.request_delay)
                 
-                async with aiohttp.ClientSession() as session:
-                    if endpoint_type == 'sync':
-                        return await self.send_sync_request(session, request_id, complexity)
-                    else:
-                        return await self.send_async_request(session, request_id, complexity)
-        
-        # Generate requests
-        tasks = []
-        for i in range(total_requests):
-            request_id = str(uuid.uuid4())
-            endpoint_type = 'sync' if i < total_requests * sync_ratio else 'async'
-            
-            task = limited_request(endpoint_type, request_id)
-            tasks.append(task)
-        
-        # Execute all requests
-        self.results = await asyncio.gather(*tasks, return_exceptions=False)
-        
-        end_time = time.time()
+                if endpoint is Endpoint.SYNC:
+                    result = await self.send_sync_request(session, request_id)
+                else:
+                    result = await self.send_async_request(session, request_id)
+                self._record_result(result)
+        
+        # Execute all requests over one pooled session so connections are reused
+        connector = aiohttp.TCPConnector(
+            limit=concurrency * 2,
+            limit_per_host=concurrency * 2,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+        async with aiohttp.ClientSession(connector=connector) as session:
+            workers = [
+                asyncio.create_task(worker(session))
+                for _ in range(min(concurrency, total_requests))
+            ]
+            await asyncio.gather(*workers)
+        
+        end_time = time.perf_counter()
         duration = end_time - start_time
         
-        # Wait a bit for async callbacks to arrive
-        if sync_ratio < 1.0:
+        # Wait for async callbacks to arrive (external endpoints never call back to us)
+        if sync_ratio < 1.0 and not self.external_callback:
             print("Waiting for async callbacks...")
-            await asyncio.sleep(5)  # Wait 5 seconds for callbacks
+            self.callback_server.expect_callbacks(len(self._pending_callback_ids))
+            try:
+                await asyncio.wait_for(self.callback_server.all_callbacks_received.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                pass
         
         # Calculate callback statistics
-        await self._calculate_callback_stats(start_time)
+        if not self.external_callback:
+            self._calculate_callback_stats(start_time)
         
         return self._calculate_stats(duration)
     
-    async def _calculate_callback_stats(self, test_start_time: float):
-        """Calculate callback statistics for async requests"""
-        # Since we're using httpbin.org which doesn't send callbacks back,
-        # simulate callback success for demo purposes
-        callback_url = self._get_callback_url()
-        is_external_callback = not callback_url.startswith('http://localhost')
-        
-        for result in self.results:
-            if result.endpoint == 'async' and result.success:
-                if is_external_callback:
-                    # Simulate successful callback for external URLs (demo purposes)
-                    result.callback_received = True
-                    # Simulate realistic callback timing (processing time + network)
-                    result.callback_latency_ms = result.latency_ms + 150  # ~150ms for processing
-                else:
-                    # Use actual callback tracking for localhost
-                    callback_time = self.callback_server.received_callbacks.get(result.request_id)
-                    if callback_time:
-                        result.callback_received = True
-                        result.callback_latency_ms = (callback_time - test_start_time) * 1000
+    def _calculate_callback_stats(self, test_start_time: float):
+        """Match local callbacks to accepted async requests (external ones were recorded on acceptance)"""
+        # Use actual callback tracking for localhost (snapshot once, the server may still be writing)
+        received_callbacks = dict(self.callback_server.received_callbacks)
+        for request_id in self._pending_callback_ids:
+            callback_time = received_callbacks.get(request_id)
+            if callback_time:
+                self.callbacks_received += 1
+                self._callback_latencies.record((callback_time - test_start_time) * 1000)
     
     def _calculate_stats(self, duration: float) -> LoadTestStats:
-        """Calculate comprehensive statistics from results"""
-        total_requests = len(self.results)
-        successful_requests = sum(1 for r in self.results if r.success)
+        """Calculate comprehensive statistics from the run's counters and latency recorders"""
+        total_requests = self.total_requests
+        successful_requests = self.successful_requests
+        rate_limited_requests = self.rate_limited_requests
+        sync_latencies = self._sync_latencies
+        callback_latencies = self._callback_latencies
+        async_successes = self._async_latencies.size
+        callbacks_received = self.callbacks_received
+        
         failed_requests = total_requests - successful_requests
-        rate_limited_requests = sum(1 for r in self.results if r.rate_limited)
         success_rate = (successful_requests / total_requests * 100) if total_requests > 0 else 0
         
         # Sync latency statistics
-        sync_latencies = [r.latency_ms for r in self.results if r.endpoint == 'sync' and r.success]
-        
-        if sync_latencies:
-            sync_latencies.sort()
-            sync_p50 = statistics.median(sync_latencies)
-            sync_p95 = sync_latencies[int(0.95 * len(sync_latencies))] if len(sync_latencies) > 1 else sync_latencies[0]
-            sync_p99 = sync_latencies[int(0.99 * len(sync_latencies))] if len(sync_latencies) > 1 else sync_latencies[0]
-            sync_avg = statistics.mean(sync_latencies)
-        else:
-            sync_p50 = sync_p95 = sync_p99 = sync_avg = 0.0
+        sync_p50, sync_p95, sync_p99 = sync_latencies.percentiles([50, 95, 99])
+        sync_avg = sync_latencies.mean()
         
         # Async callback statistics
-        async_results = [r for r in self.results if r.endpoint == 'async' and r.success]
-        callbacks_received = sum(1 for r in async_results if r.callback_received)
-        callback_success_rate = (callbacks_received / len(async_results) * 100) if async_results else 0
-        
-        callback_latencies = [r.callback_latency_ms for r in async_results if r.callback_received and r.callback_latency_ms]
-        
-        if callback_latencies:
-            callback_latencies.sort()
-            callback_p50 = statistics.median(callback_latencies)
-            callback_p95 = callback_latencies[int(0.95 * len(callback_latencies))] if len(callback_latencies) > 1 else callback_latencies[0]
-            callback_p99 = callback_latencies[int(0.99 * len(callback_latencies))] if len(callback_latencies) > 1 else callback_latencies[0]
-        else:
-            callback_p50 = callback_p95 = callback_p99 = 0.0
+        callback_success_rate = (callbacks_received / async_successes * 100) if async_successes else 0
+        callback_p50, callback_p95, callback_p99 = callback_latencies.percentiles([50, 95, 99])
         
         return LoadTestStats(
             total_requests=total_requests,
@@ -438,12 +616,20 @@ class LoadGenerator:
             callback_latency_p99=callback_p99
         )
     
+    def latency_samples(self) -> Dict[str, np.ndarray]:
+        """Raw latency samples (ms) per series, for --dump-samples output"""
+        return {
+            'sync': self._sync_latencies.samples(),
+            'async': self._async_latencies.samples(),
+            'callback': self._callback_latencies.samples()
+        }
+    
     def print_demo_analysis(self, stats: LoadTestStats):
         """Print analysis specifically focused on sync vs async differences for demo mode"""
-        sync_results = [r for r in self.results if r.endpoint == 'sync' and r.success]
-        async_results = [r for r in self.results if r.endpoint == 'async' and r.success]
+        sync_latencies = self._sync_latencies
+        async_latencies = self._async_latencies
         
-        if not sync_results or not async_results:
+        if not sync_latencies.size or not async_latencies.size:
             print("   ⚠️  Need both sync and async requests for comparison")
             return
         
@@ -452,7 +638,7 @@ class LoadGenerator:
         
         # Response time comparison
         sync_avg = stats.sync_latency_avg
-        async_immediate = statistics.mean([r.latency_ms for r in async_results])  # Just acceptance time
+        async_immediate = async_latencies.mean()  # Just acceptance time
         
         print(f"   📊 IMMEDIATE RESPONSE TIMES:")
         print(f"      Sync (full processing):    {sync_avg:.2f}ms")
@@ -460,8 +646,8 @@ class LoadGenerator:
         print(f"      📈 Speed improvement:       {(sync_avg/async_immediate):.1f}x faster acceptance")
         
         # Throughput comparison
-        sync_count = len(sync_results)
-        async_count = len(async_results)
+        sync_count = sync_latencies.size
+        async_count = async_latencies.size
         total_duration = stats.duration_seconds
         
         sync_throughput = sync_count / total_duration
@@ -486,12 +672,12 @@ class LoadGenerator:
             print(f"      📈 Trade-off analysis:     Immediate {async_immediate:.2f}ms vs Complete {stats.callback_latency_p50:.2f}ms")
         
         # Concurrency impact analysis
-        if len(self.results) > 10:  # Only if we have enough data
+        if self.total_requests > 10:  # Only if we have enough data
             print(f"\n   📊 CONCURRENCY IMPACT ANALYSIS:")
             
             # Calculate variance in response times (indicator of blocking behavior)
-            sync_variance = statistics.variance([r.latency_ms for r in sync_results]) if len(sync_results) > 1 else 0
-            async_variance = statistics.variance([r.latency_ms for r in async_results]) if len(async_results) > 1 else 0
+            sync_variance = sync_latencies.variance()
+            async_variance = async_latencies.variance()
             
             print(f"      Sync response variance:   {sync_variance:.2f}ms²")
             print(f"      Async response variance:  {async_variance:.2f}ms²")
@@ -525,6 +711,52 @@ class LoadGenerator:
             print(f"         • Async reliability: Production-ready ({stats.async_callback_success_rate:.1f}% success rate)")
 
 
+
+# Console report templates, filled from the LoadTestStats fields and written in one call
+RESULTS_REPORT = """
+{rule}
+LOAD TEST RESULTS{mode_suffix}
+{rule}
+Total Requests: {total_requests}
+Successful: {successful_requests}
+Failed: {failed_requests}
+Rate Limited: {rate_limited_requests}
+Success Rate: {success_rate:.2f}%
+Duration: {duration_seconds:.2f}s
+Requests/sec: {requests_per_second:.2f}
+{mode_insights}
+SYNC ENDPOINT LATENCIES (ms):
+  Average: {sync_latency_avg:.2f}
+  P50: {sync_latency_p50:.2f}
+  P95: {sync_latency_p95:.2f}
+  P99: {sync_latency_p99:.2f}
+
+ASYNC CALLBACK STATS:
+  Callbacks Received: {async_callbacks_received}
+  Callback Success Rate: {async_callback_success_rate:.2f}%
+  Callback P50: {callback_latency_p50:.2f}ms
+  Callback P95: {callback_latency_p95:.2f}ms
+  Callback P99: {callback_latency_p99:.2f}ms
+"""
+
+DEMO_INSIGHTS = """
+🎭 DEMO MODE INSIGHTS:
+   Focus on comparing sync vs async performance patterns below
+"""
+
+PRODUCTION_INSIGHTS = """
+🔒 PRODUCTION MODE INSIGHTS:
+   Results validated against security and operational constraints
+"""
+
+PRODUCTION_VALIDATION = """
+🔒 PRODUCTION VALIDATION:
+   Security constraints respected: ✅
+   Rate limiting behavior: {rate_limited_requests} requests limited
+   System stability: {stability}
+"""
+
+
 @click.command()
 @click.option('--url', default='http://localhost:8000', help='Base URL of the API server')
 @click.option('--requests', '-n', default=100, help='Total number of requests to send')
@@ -535,9 +767,10 @@ class LoadGenerator:
 @click.option('--output', help='Output file for results (JSON format)')
 @click.option('--demo-mode', is_flag=True, help='Demo mode: Optimize for showing sync vs async differences')
 @click.option('--production-mode', is_flag=True, help='Production mode: Security-aware testing with conservative limits')
+@click.option('--dump-samples', is_flag=True, help='Keep every latency sample and include them in --output')
 def run_load_test(url: str, requests: int, concurrency: int, sync_ratio: float, 
                  complexity: int, callback_port: int, output: Optional[str],
-                 demo_mode: bool, production_mode: bool):
+                 demo_mode: bool, production_mode: bool, dump_samples: bool):
     """
     Load test with dual modes for different use cases.
     
@@ -602,6 +835,10 @@ def run_load_test(url: str, requests: int, concurrency: int, sync_ratio: float,
     click.echo()
     
     async def main():
+        # Start tasks eagerly (Python 3.12+) so each request runs up to its first await without a scheduler hop
+        if hasattr(asyncio, 'eager_task_factory'):
+            asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+        
         # Set environment for testing
         if demo_mode:
             os.environ['ENVIRONMENT'] = 'development'
@@ -626,68 +863,59 @@ def run_load_test(url: str, requests: int, concurrency: int, sync_ratio: float,
                 url, 
                 callback_server,
                 demo_mode=demo_mode,
-                production_mode=production_mode
+                production_mode=production_mode,
+                dump_samples=dump_samples
             )
             
             # Run load test
             stats = await generator.run_load_test(requests, concurrency, sync_ratio, complexity)
             
+            # Materialize the stats once; the console report and the output file both read this dict
+            report = asdict(stats)
+            
             # Print results with mode-aware formatting
             mode_suffix = " (DEMO)" if demo_mode else " (PRODUCTION)" if production_mode else ""
             
-            print("\n" + "="*70)
-            print(f"LOAD TEST RESULTS{mode_suffix}")
-            print("="*70)
-            print(f"Total Requests: {stats.total_requests}")
-            print(f"Successful: {stats.successful_requests}")
-            print(f"Failed: {stats.failed_requests}")
-            print(f"Rate Limited: {stats.rate_limited_requests}")
-            print(f"Success Rate: {stats.success_rate:.2f}%")
-            print(f"Duration: {stats.duration_seconds:.2f}s")
-            print(f"Requests/sec: {stats.requests_per_second:.2f}")
-            
             if demo_mode:
-                print("\n🎭 DEMO MODE INSIGHTS:")
-                print("   Focus on comparing sync vs async performance patterns below")
+                mode_insights = DEMO_INSIGHTS
             elif production_mode:
-                print("\n🔒 PRODUCTION MODE INSIGHTS:")
-                print("   Results validated against security and operational constraints")
+                mode_insights = PRODUCTION_INSIGHTS
+            else:
+                mode_insights = ""
             
-            print()
-            print("SYNC ENDPOINT LATENCIES (ms):")
-            print(f"  Average: {stats.sync_latency_avg:.2f}")
-            print(f"  P50: {stats.sync_latency_p50:.2f}")
-            print(f"  P95: {stats.sync_latency_p95:.2f}")
-            print(f"  P99: {stats.sync_latency_p99:.2f}")
-            print()
-            print("ASYNC CALLBACK STATS:")
-            print(f"  Callbacks Received: {stats.async_callbacks_received}")
-            print(f"  Callback Success Rate: {stats.async_callback_success_rate:.2f}%")
-            print(f"  Callback P50: {stats.callback_latency_p50:.2f}ms")
-            print(f"  Callback P95: {stats.callback_latency_p95:.2f}ms")
-            print(f"  Callback P99: {stats.callback_latency_p99:.2f}ms")
+            sys.stdout.write(RESULTS_REPORT.format(
+                rule="=" * 70, mode_suffix=mode_suffix, mode_insights=mode_insights, **report
+            ))
             
             # Mode-specific analysis
             if demo_mode:
                 generator.print_demo_analysis(stats)
             elif production_mode:
-                print("\n🔒 PRODUCTION VALIDATION:")
-                print(f"   Security constraints respected: ✅")
-                print(f"   Rate limiting behavior: {stats.rate_limited_requests} requests limited")
-                print(f"   System stability: {'✅ Stable' if stats.success_rate > 90 else '⚠️ Check errors'}")
+                sys.stdout.write(PRODUCTION_VALIDATION.format(
+                    rate_limited_requests=report['rate_limited_requests'],
+                    stability='✅ Stable' if report['success_rate'] > 90 else '⚠️ Check errors'
+                ))
             
             # Save results if requested
             if output:
-                with open(output, 'w') as f:
-                    json.dump(asdict(stats), f, indent=2)
-                print(f"\n💾 Results saved to: {output}")
+                results = {**report, 'latency_samples': generator.latency_samples()} if dump_samples else report
+                with open(output, 'wb') as f:
+                    f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+                sys.stdout.write(f"\n💾 Results saved to: {output}\n")
             
-            print("\n" + "="*70)
+            sys.stdout.write("\n" + "=" * 70 + "\n")
             
         finally:
             if using_localhost:
                 await callback_server.stop()
     
+    # Prefer uvloop's libuv-based event loop when installed (it is not available on Windows)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     asyncio.run(main())
 
 
@@ -1,9 +1,19 @@
 import os
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Text, Enum
+import asyncio
+import threading
+from sqlalchemy import bindparam, event, exc, update, Column, Index, String, Integer, Float, Text, SmallInteger, LargeBinary
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, async_scoped_session
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql import text
+from sqlalchemy.types import TypeDecorator
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import time
 import uuid
+import orjson
+import zstandard
 from models import RequestMode, RequestStatus
 
 # Database setup with environment-aware connection pooling
@@ -11,49 +21,290 @@ environment = os.getenv('ENVIRONMENT', 'development')
 
 if environment == 'production':
     # Production: File-based SQLite
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./api_requests.db"
-    engine = create_engine(
+    SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./api_requests.db"
+    engine = create_async_engine(
         SQLALCHEMY_DATABASE_URL, 
         connect_args={"check_same_thread": False},
         pool_pre_ping=True
     )
 else:
     # Development/demo: In-memory SQLite for better concurrency
-    SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-    engine = create_engine(
+    SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+    engine = create_async_engine(
         SQLALCHEMY_DATABASE_URL, 
         connect_args={"check_same_thread": False},
-        pool_pre_ping=True,
+        # Every session must share the one :memory: database, but concurrent AsyncSessions
+        # cannot interleave on a single connection: check it out one session at a time instead
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
         echo=False  # Disable SQL logging for performance
     )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite for write-heavy load: WAL journal, no fsync per commit, in-memory temp tables"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
+
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 v7): 48-bit ms timestamp followed by random bits"""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | (0x7 << 76)  # version 7
+    value = value & ~(0x3 << 62) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+class UUIDBytes(TypeDecorator):
+    """Stores UUIDs as 16 raw bytes while exposing them as canonical strings"""
+    impl = LargeBinary(16)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value.bytes
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return str(uuid.UUID(bytes=value))
+
+
+class EnumCode(TypeDecorator):
+    """Stores a str Enum as its declaration index in a SmallInteger (append new members only)"""
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+        self._members = tuple(enum_class)
+        self._codes = {member: code for code, member in enumerate(self._members)}
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._codes[self.enum_class(value)]
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._members[value]
+
+
+class UnixMillis(TypeDecorator):
+    """Stores naive-UTC datetimes as INTEGER milliseconds since the Unix epoch"""
+    impl = Integer
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+
+# Clock read done by SQLite itself at insert time, in the same unit as UnixMillis
+UNIX_MILLIS_NOW = text("(CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER))")
+
+
+_zstd = threading.local()
+
+
+class CompressedJSON(TypeDecorator):
+    """Stores JSON-serializable values as zstd-compressed BLOBs"""
+    impl = LargeBinary
+    cache_ok = True
+    
+    @staticmethod
+    def _codecs():
+        # zstd contexts are reused for speed but must not be shared across threads
+        if not hasattr(_zstd, 'compressor'):
+            _zstd.compressor = zstandard.ZstdCompressor(level=3)
+            _zstd.decompressor = zstandard.ZstdDecompressor()
+        return _zstd.compressor, _zstd.decompressor
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._codecs()[0].compress(orjson.dumps(value))
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return orjson.loads(self._codecs()[1].decompress(value))
+
+
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) reload
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+# One AsyncSession per request task: everything resolved for a request shares it until get_db removes it
+ScopedSession = async_scoped_session(SessionLocal, scopefunc=asyncio.current_task)
 Base = declarative_base()
 
 
 class RequestRecord(Base):
     __tablename__ = "requests"
+    __table_args__ = (
+        Index("ix_requests_status_created", "status", "created_at"),  # /stats status counts
+        Index("ix_requests_mode_created", "mode", "created_at"),  # /requests?mode= and /stats per-mode queries
+        Index("ix_requests_created_at", "created_at"),  # /requests newest-first listing
+        Index("ix_requests_mode_status_created", "mode", "status", "created_at"),  # mode+status filters, newest first
+    )
     
-    request_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    mode = Column(Enum(RequestMode), nullable=False)
-    status = Column(Enum(RequestStatus), nullable=False, default=RequestStatus.PENDING)
-    input_data = Column(Text, nullable=False)  # JSON string
-    result = Column(Text, nullable=True)  # JSON string
+    request_id = Column(UUIDBytes, primary_key=True, default=lambda: str(uuid7()))
+    mode = Column(EnumCode(RequestMode), nullable=False)
+    status = Column(EnumCode(RequestStatus), nullable=False, default=RequestStatus.PENDING)
+    input_data = Column(CompressedJSON, nullable=False)
+    result = Column(CompressedJSON, nullable=True)
     processing_time_ms = Column(Float, nullable=True)
     callback_url = Column(String, nullable=True)
     callback_attempts = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    completed_at = Column(DateTime, nullable=True)
+    created_at = Column(UnixMillis, nullable=False, server_default=UNIX_MILLIS_NOW)
+    completed_at = Column(UnixMillis, nullable=True)
     error_message = Column(Text, nullable=True)
 
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+def _create_schema(sync_conn):
+    Base.metadata.create_all(sync_conn)
+    # create_all skips tables that already exist, so add any index declared since a file DB was made
+    for index in RequestRecord.__table__.indexes:
+        index.create(sync_conn, checkfirst=True)
+
+
+async def init_db(attempts: int = 3):
+    """Create tables (called from the app lifespan; the async engine cannot run DDL at import)"""
+    for attempt in range(attempts):
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(_create_schema)
+            return
+        except exc.OperationalError:
+            # Another worker process created the same table/index between our check and CREATE
+            if attempt == attempts - 1:
+                raise
+
+
+class DBWriter:
+    """Coalesces RequestRecord inserts into batched commits (one commit per batch, not per row)"""
+    
+    def __init__(self, max_batch: int = 100, max_delay: float = 0.005, max_pending: int = 1000):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _ensure_started(self):
+        """Start the drain task on the running loop the first time a row is enqueued"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = loop.create_task(self._run())
+    
+    async def enqueue(self, row: Dict[str, Any]):
+        """Queue a row for writing and wait until the batch containing it is committed"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((row, future))  # Backpressure once max_pending rows are waiting
+        await future
+    
+    async def _run(self):
+        """Drain the queue, flushing every max_batch rows or max_delay seconds"""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._write(batch)
+    
+    async def _execute(self, session, rows: List[Dict[str, Any]]):
+        # Rows carry caller-assigned IDs, so a retried row is skipped rather than failing the batch
+        await session.execute(insert(RequestRecord).on_conflict_do_nothing(), rows)
+    
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Write a batch as one executemany statement in a single transaction and resolve the waiting futures"""
+        try:
+            async with SessionLocal() as session:
+                await self._execute(session, [row for row, _ in batch])
+                await session.commit()
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+    
+    async def flush(self):
+        """Write any queued rows and stop the drain task (used on shutdown)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            await self._write(batch)
+        self._task = None
+
+
+class DBUpdater(DBWriter):
+    """Coalesces RequestRecord updates (dicts keyed by request_id) into batched commits"""
+    
+    async def _execute(self, session, rows: List[Dict[str, Any]]):
+        # Core UPDATE ... WHERE request_id = ? as one executemany per set of changed columns. Unlike
+        # the ORM bulk UPDATE it doesn't raise when an ID matches no row, so one bad row can't fail the batch
+        columns = RequestRecord.__table__.c
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+        for keys, group in groups.items():
+            statement = (
+                update(RequestRecord.__table__)
+                .where(columns.request_id == bindparam('b_request_id'))
+                .values({key: bindparam(key, type_=columns[key].type) for key in keys if key != 'request_id'})
+            )
+            await session.execute(statement, [
+                {**{key: value for key, value in row.items() if key != 'request_id'}, 'b_request_id': row['request_id']}
+                for row in group
+            ])
+
+
+db_writer = DBWriter()
+db_updater = DBUpdater(max_delay=0.05)
 
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
+async def get_db():
+    """Dependency to get the request-scoped database session (resolved on the event loop, no threadpool hop)"""
+    db = ScopedSession()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        await ScopedSession.remove()
\ No newline at end of file
@@ -2,70 +2,125 @@ import asyncio
 import time
 import uuid
 import os
+import ipaddress
+import socket
 import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from datetime import datetime
-from typing import List, Optional, Dict
-from collections import defaultdict, deque
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Request
+from typing import List, Optional, Dict, Tuple
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, case, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db, SessionLocal
+from database import get_db, init_db, RequestRecord, db_writer, db_updater, uuid7
 from models import (
     WorkRequest, AsyncWorkRequest, WorkResponse, AsyncAckResponse,
     RequestDetails, HealthResponse, RequestMode, RequestStatus
 )
-from services import RequestService, CallbackService
-from work_processor import WorkProcessor
+from services import RequestService, CallbackService, RedisCallbackService
+from work_processor import WorkProcessor, start_cpu_pool, shutdown_cpu_pool
+
+try:
+    import redis.asyncio as aioredis  # Optional: rate limits shared by every uvicorn worker
+except ImportError:
+    aioredis = None
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
+    force=True,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
 # Rate limiting configuration
 class RateLimiter:
-    """Rate limiter with sliding window"""
+    """
+    Rate limiter with a sliding-window counter.
+    
+    Each IP keeps only (window_index, current_count, previous_count); the previous fixed
+    window's count is weighted by how much of it still overlaps the sliding window.
+    Per-window totals are kept alongside so get_stats never walks the IP table. The IP table
+    is ordered least recently counted first: expired IPs are popped off its front, and past
+    max_tracked_ips the least recently counted IP is forgotten to cap memory.
+    """
     
-    def __init__(self, max_requests: int = 100, window_seconds: int = 60):
+    def __init__(self, max_requests: int = 100, window_seconds: int = 60, max_tracked_ips: int = 100_000):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = defaultdict(deque)  # IP -> deque of timestamps
+        self.max_tracked_ips = max_tracked_ips
+        self.counters: OrderedDict[str, Tuple[int, int, int]] = OrderedDict()  # IP -> (window_index, curr, prev)
+        self._window_totals: Dict[int, int] = {}  # window_index -> requests allowed
+        self._window_ips: Dict[int, int] = {}  # window_index -> IPs counted in that window
+        self._fresh_ips: Dict[int, int] = {}  # window_index -> of those, IPs idle in the previous window
+    
+    def _window_counts(self, client_ip: str, window_index: int) -> Tuple[int, int]:
+        """Current and previous window counts for an IP, shifted to window_index"""
+        stored = self.counters.get(client_ip)
+        if stored is None:
+            return 0, 0
+        stored_index, curr, prev = stored
+        if stored_index == window_index:
+            return curr, prev
+        if stored_index == window_index - 1:
+            return 0, curr
+        return 0, 0
+    
+    def _evict(self, window_index: int):
+        """Drop per-window bookkeeping, and IPs last seen, older than the previous window"""
+        while self.counters and next(iter(self.counters.values()))[0] < window_index - 1:
+            self.counters.popitem(last=False)
+        for old in [w for w in self._window_totals if w < window_index - 1]:
+            del self._window_totals[old]
+            self._window_ips.pop(old, None)
+            self._fresh_ips.pop(old, None)
         
     async def is_allowed(self, client_ip: str) -> bool:
         """Check if request is allowed based on rate limits"""
         now = time.time()
-        client_requests = self.requests[client_ip]
+        window_index, offset = divmod(now, self.window_seconds)
+        window_index = int(window_index)
+        self._evict(window_index)
+        curr, prev = self._window_counts(client_ip, window_index)
         
-        # Remove old requests outside the window
-        while client_requests and client_requests[0] <= now - self.window_seconds:
-            client_requests.popleft()
-        
-        # Check if under limit
-        if len(client_requests) >= self.max_requests:
+        # Estimate requests in the last window_seconds
+        weighted = prev * (1 - offset / self.window_seconds) + curr
+        if weighted >= self.max_requests:
             return False
         
-        # Add current request
-        client_requests.append(now)
+        if curr == 0:  # First request from this IP in the current window
+            self._window_ips[window_index] = self._window_ips.get(window_index, 0) + 1
+            if prev == 0:
+                self._fresh_ips[window_index] = self._fresh_ips.get(window_index, 0) + 1
+        self._window_totals[window_index] = self._window_totals.get(window_index, 0) + 1
+        self.counters[client_ip] = (window_index, curr + 1, prev)
+        self.counters.move_to_end(client_ip)
+        if len(self.counters) > self.max_tracked_ips:
+            # Forget the least recently counted IP; it is recounted as new if it comes back
+            _, (evicted_index, _, evicted_prev) = self.counters.popitem(last=False)
+            if evicted_index in self._window_ips:
+                self._window_ips[evicted_index] -= 1
+                if evicted_prev == 0:
+                    self._fresh_ips[evicted_index] -= 1
         return True
     
     def get_stats(self) -> Dict[str, int]:
         """Get rate limiting statistics"""
         now = time.time()
-        active_ips = 0
-        total_recent_requests = 0
+        window_index, offset = divmod(now, self.window_seconds)
+        window_index = int(window_index)
+        overlap = 1 - offset / self.window_seconds
+        self._evict(window_index)
         
-        for ip, requests in self.requests.items():
-            # Clean old requests
-            while requests and requests[0] <= now - self.window_seconds:
-                requests.popleft()
-            
-            if requests:
-                active_ips += 1
-                total_recent_requests += len(requests)
+        # IPs seen in the previous window plus those first seen in the current one
+        active_ips = self._window_ips.get(window_index - 1, 0) + self._fresh_ips.get(window_index, 0)
+        total_recent_requests = int(
+            self._window_totals.get(window_index - 1, 0) * overlap + self._window_totals.get(window_index, 0)
+        )
         
         return {
             "active_ips": active_ips,
@@ -74,12 +129,76 @@ class RateLimiter:
             "window_seconds": self.window_seconds
         }
 
+
+class RedisRateLimiter:
+    """
+    Sliding-window log in a Redis sorted set per IP, shared across worker processes.
+    
+    Trimming, counting and recording happen in one Lua script (one round trip, atomic).
+    Falls back to an in-process RateLimiter if Redis is unreachable.
+    """
+    
+    SCRIPT = """
+    local key = KEYS[1]
+    local now = tonumber(ARGV[1])
+    local window = tonumber(ARGV[2])
+    redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[3]) then
+        return 0
+    end
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+    return 1
+    """
+    
+    def __init__(self, redis_url: str, max_requests: int = 100, window_seconds: int = 60):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.client = aioredis.from_url(redis_url)
+        self.script = self.client.register_script(self.SCRIPT)  # EVALSHA, reloading on NOSCRIPT
+        self.fallback = RateLimiter(max_requests, window_seconds)
+        self._member_prefix = f"{os.getpid()}-"
+        self._sequence = 0
+    
+    async def is_allowed(self, client_ip: str) -> bool:
+        """Check if request is allowed based on rate limits"""
+        self._sequence += 1
+        now_ms = int(time.time() * 1000)
+        try:
+            allowed = await self.script(
+                keys=[f"rl:{client_ip}"],
+                args=[now_ms, self.window_seconds * 1000, self.max_requests,
+                      f"{self._member_prefix}{self._sequence}"]
+            )
+        except aioredis.RedisError as e:
+            logger.warning("Redis rate limiter unavailable, using in-process limits: %s", e)
+            return await self.fallback.is_allowed(client_ip)
+        return bool(allowed)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get rate limiting statistics (per-IP counts live in Redis and are not scanned)"""
+        return {
+            "backend": "redis",
+            "max_requests_per_window": self.max_requests,
+            "window_seconds": self.window_seconds
+        }
+    
+    async def close(self):
+        await self.client.aclose()
+
+
 # Environment-aware rate limiter configuration
 environment = os.getenv('ENVIRONMENT', 'development')
 if environment == 'production':
-    rate_limiter = RateLimiter(max_requests=50, window_seconds=60)  # Production limits
+    rate_limits = {"max_requests": 50, "window_seconds": 60}  # Production limits
 else:
-    rate_limiter = RateLimiter(max_requests=1000, window_seconds=60)  # Development/demo limits
+    rate_limits = {"max_requests": 1000, "window_seconds": 60}  # Development/demo limits
+
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL and aioredis is not None:
+    rate_limiter = RedisRateLimiter(REDIS_URL, **rate_limits)
+else:
+    rate_limiter = RateLimiter(**rate_limits)
 
 async def check_rate_limit(request: Request) -> None:
     """Dependency to check rate limits"""
@@ -90,7 +209,7 @@ async def check_rate_limit(request: Request) -> None:
     client_ip = request.client.host if request.client else "unknown"
     
     if not await rate_limiter.is_allowed(client_ip):
-        logger.warning(f"Rate limit exceeded for IP: {client_ip}")
+        logger.warning("Rate limit exceeded for IP: %s", client_ip)
         raise HTTPException(
             status_code=429,
             detail={
@@ -103,23 +222,131 @@ async def check_rate_limit(request: Request) -> None:
 # Enhanced error handler
 async def validation_exception_handler(request: Request, exc: HTTPException):
     """Custom error handler for better error responses"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail if isinstance(exc.detail, str) else exc.detail,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": request.state.received_at.isoformat(),
             "path": str(request.url),
             "method": request.method
         }
     )
 
+class RequestClockMiddleware:
+    """Pure ASGI middleware that reads the clocks once per request
+    
+    request.state.received_at (naive UTC datetime) is used for response timestamps and
+    request.state.started (perf_counter) for elapsed-time measurements.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            state = scope.setdefault("state", {})
+            state["started"] = time.perf_counter()
+            state["received_at"] = datetime.utcnow()
+        await self.app(scope, receive, send)
+
+# Bounded async work pipeline: accepted request IDs wait here for a fixed pool of workers
+ASYNC_QUEUE_SIZE = 1000
+ASYNC_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# Seconds shutdown waits for queued async requests before failing whatever is left
+ASYNC_DRAIN_TIMEOUT = float(os.getenv('ASYNC_DRAIN_TIMEOUT', 10))
+
+
+# Strong references to in-flight persist-and-dispatch tasks (the loop only keeps weak ones)
+_background_tasks: set = set()
+
+# Request IDs a worker has taken off the queue and not finished yet
+_in_flight: set = set()
+
+
+async def _persist_and_dispatch(work_queue: asyncio.Queue, request_id: str, input_data: Dict, callback_url: str):
+    """Insert an accepted request's record, then hand it to the worker pool once it is committed"""
+    try:
+        await request_service.enqueue_request_record(
+            RequestMode.ASYNC, input_data, callback_url, request_id=request_id
+        )
+    except Exception as e:
+        logger.error("Failed to persist async request %s: %s", request_id, e)
+        # The client already holds this ID: report it as failed rather than 404
+        request_service.record_persist_failure(request_id, RequestMode.ASYNC, input_data, callback_url, e)
+        return
+    # Waits only if the queue filled up meanwhile; the worker gets the payload too, so it never re-reads the row
+    await work_queue.put((request_id, input_data, callback_url))
+
+
+async def _async_worker(queue: asyncio.Queue):
+    """Process accepted async requests one at a time until cancelled"""
+    while True:
+        request_id, input_data, callback_url = await queue.get()
+        _in_flight.add(request_id)
+        try:
+            await callback_service.process_async_callback(request_id, input_data, callback_url)
+        except Exception as e:
+            logger.error("Async worker failed on request %s: %s", request_id, e)
+        finally:
+            _in_flight.discard(request_id)
+            queue.task_done()
+
+
+async def _fail_unprocessed(queue: asyncio.Queue, interrupted: set):
+    """Mark requests still queued, or interrupted mid-processing, at shutdown as FAILED"""
+    request_ids = set(interrupted)
+    while not queue.empty():
+        request_ids.add(queue.get_nowait()[0])
+        queue.task_done()
+    if not request_ids:
+        return
+    logger.warning("Shutting down with %d unprocessed async requests; marking them failed", len(request_ids))
+    completed_at = datetime.utcnow()
+    await asyncio.gather(*(
+        db_updater.enqueue({
+            "request_id": request_id,
+            "status": RequestStatus.FAILED,
+            "error_message": "Server shut down before the request was processed",
+            "completed_at": completed_at
+        })
+        for request_id in request_ids
+    ), return_exceptions=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create tables and start the async worker pool; on shutdown drain it, flush batched DB writes and release HTTP/Redis clients"""
+    await init_db()
+    await start_cpu_pool()
+    app.state.work_queue = asyncio.Queue(maxsize=ASYNC_QUEUE_SIZE)
+    workers = [asyncio.create_task(_async_worker(app.state.work_queue)) for _ in range(ASYNC_WORKERS)]
+    yield
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    try:
+        await asyncio.wait_for(app.state.work_queue.join(), ASYNC_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+    interrupted = set(_in_flight)  # Snapshot first: cancelled workers clear their entries
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    await _fail_unprocessed(app.state.work_queue, interrupted)
+    await db_writer.flush()
+    await db_updater.flush()
+    await callback_service.close()
+    shutdown_cpu_pool()
+    if isinstance(rate_limiter, RedisRateLimiter):
+        await rate_limiter.close()
+
 # App initialization
 app = FastAPI(
+    lifespan=lifespan,
     title="Sync vs Async API Demo",
     description="""
     Demonstration of synchronous and asynchronous API patterns under load.
     """,
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add custom error handlers
@@ -133,10 +360,14 @@ app.add_middleware(
     allow_methods=["GET", "POST"],  # Only needed methods
     allow_headers=["Content-Type", "Authorization"],  # Specific headers
 )
+app.add_middleware(RequestClockMiddleware)
 
 # Services
 request_service = RequestService()
-callback_service = CallbackService()
+if REDIS_URL and aioredis is not None:
+    callback_service = RedisCallbackService(REDIS_URL)  # Circuit breakers shared across workers
+else:
+    callback_service = CallbackService()
 
 # App startup time for health check
 app_start_time = time.time()
@@ -145,7 +376,8 @@ app_start_time = time.time()
 @app.post("/sync", response_model=WorkResponse)
 async def sync_endpoint(
     request: WorkRequest,
-    db: Session = Depends(get_db),
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
     _: None = Depends(check_rate_limit)
 ):
     """
@@ -159,7 +391,9 @@ async def sync_endpoint(
     """
     # Enhanced input validation
     if not WorkProcessor.validate_input(request.data):
-        logger.warning(f"Invalid input data received: {request.data}")
+        logger.warning("Invalid input data received on /sync")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Rejected input payload: %r", request.data)
         raise HTTPException(
             status_code=400, 
             detail={
@@ -171,20 +405,19 @@ async def sync_endpoint(
     
     try:
         # Process request synchronously with enhanced logging
-        start_time = time.time()
-        logger.info(f"Processing sync request with complexity {request.complexity}")
+        logger.info("Processing sync request with complexity %s", request.complexity)
         
-        result = request_service.process_sync_request(
+        result = await request_service.process_sync_request(
             db, request.data, request.complexity
         )
         
-        processing_time = (time.time() - start_time) * 1000
-        logger.info(f"Sync request completed in {processing_time:.2f}ms")
+        processing_time = (time.perf_counter() - http_request.state.started) * 1000
+        logger.info("Sync request completed in %.2fms", processing_time)
         
         return WorkResponse(**result)
         
     except ValueError as e:
-        logger.error(f"Validation error in sync processing: {str(e)}")
+        logger.error("Validation error in sync processing: %s", e)
         raise HTTPException(
             status_code=400, 
             detail={
@@ -194,7 +427,7 @@ async def sync_endpoint(
             }
         )
     except Exception as e:
-        logger.error(f"Unexpected error in sync processing: {str(e)}")
+        logger.error("Unexpected error in sync processing: %s", e)
         raise HTTPException(
             status_code=500, 
             detail={
@@ -205,11 +438,91 @@ async def sync_endpoint(
         )
 
 
+# Callback URL (SSRF) policy, built once at import
+IS_PRODUCTION = environment == 'production'
+BLOCKED_CALLBACK_HOSTS = frozenset({'localhost', '127.0.0.1', '0.0.0.0', '::1', 'metadata.google.internal'})
+METADATA_DOMAINS = frozenset({
+    'metadata.google.internal',
+    '169.254.169.254',  # AWS/GCP metadata
+    'metadata.azure.com'
+})
+
+
+@lru_cache(maxsize=4096)
+def _classify_host(hostname: str) -> Tuple[bool, Optional[str], bool]:
+    """(internal host, private/loopback IP the host encodes or None, metadata endpoint), cached per hostname"""
+    host = hostname.strip('[]').rstrip('.').lower()  # Bracketed IPv6, FQDN trailing dot
+    private_ip = None
+    ip = None
+    # Only hosts that can be IP literals are parsed
+    if host[:1].isdigit() or ':' in host:
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            try:
+                # Shorthand IPv4 forms (2130706433, 0x7f.1, 127.1) still reach the address they encode
+                ip = ipaddress.IPv4Address(socket.inet_aton(host))
+            except OSError:
+                ip = None  # Not an IP address, hostname is OK
+        if ip is not None and getattr(ip, 'ipv4_mapped', None):
+            ip = ip.ipv4_mapped  # ::ffff:a.b.c.d reaches a.b.c.d
+        if ip is not None and (ip.is_private or ip.is_loopback):
+            private_ip = str(ip)
+    # Blocklists are matched against the decoded address too, not only the spelling in the URL
+    names = {host, str(ip)} if ip is not None else {host}
+    return (not names.isdisjoint(BLOCKED_CALLBACK_HOSTS), private_ip,
+            not names.isdisjoint(METADATA_DOMAINS))
+
+
+def _validate_callback_url(hostname: str) -> None:
+    """Reject callback URLs that could be used for SSRF; raises HTTPException(400)
+    
+    hostname comes from the request model's HttpUrl, which has already enforced an
+    http(s) scheme and a host and normalized that host.
+    """
+    is_internal, private_ip, is_metadata = _classify_host(hostname)
+    
+    # Block internal/localhost addresses in production
+    if IS_PRODUCTION and is_internal:
+        logger.warning("Blocked callback to internal host: %s", hostname)
+        raise HTTPException(
+            status_code=400, 
+            detail={
+                "error": "Callback URL not allowed",
+                "message": "Callbacks to localhost/internal hosts not allowed in production",
+                "code": "BLOCKED_HOST"
+            }
+        )
+    
+    # Block private IP ranges
+    if IS_PRODUCTION and private_ip:
+        logger.warning("Blocked callback to private IP: %s", private_ip)
+        raise HTTPException(
+            status_code=400, 
+            detail={
+                "error": "Private IP not allowed",
+                "message": "Callbacks to private IP addresses not allowed in production",
+                "code": "PRIVATE_IP_BLOCKED"
+            }
+        )
+    
+    # Block cloud metadata endpoints
+    if is_metadata:
+        logger.warning("Blocked callback to metadata endpoint: %s", hostname)
+        raise HTTPException(
+            status_code=400, 
+            detail={
+                "error": "Metadata endpoint blocked",
+                "message": "Callbacks to cloud metadata endpoints are not allowed",
+                "code": "METADATA_BLOCKED"
+            }
+        )
+
+
 @app.post("/async", response_model=AsyncAckResponse)
 async def async_endpoint(
     request: AsyncWorkRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    http_request: Request,
     _: None = Depends(check_rate_limit)
 ):
     """
@@ -225,7 +538,9 @@ async def async_endpoint(
     """
     # Enhanced input validation
     if not WorkProcessor.validate_input(request.data):
-        logger.warning(f"Invalid input data received: {request.data}")
+        logger.warning("Invalid input data received on /async")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Rejected input payload: %r", request.data)
         raise HTTPException(
             status_code=400, 
             detail={
@@ -237,118 +552,36 @@ async def async_endpoint(
     
     # Comprehensive callback URL validation for security
     callback_url_str = str(request.callback_url)
+    _validate_callback_url(request.callback_url.host)
     
-    # Basic URL format validation
-    if not (callback_url_str.startswith('http://') or callback_url_str.startswith('https://')):
-        logger.warning(f"Invalid callback URL scheme: {callback_url_str}")
+    # Shed load before creating a record when the worker pool is saturated; accepted requests
+    # still being persisted hold a slot too, since each will be put on the queue once committed
+    work_queue: asyncio.Queue = http_request.app.state.work_queue
+    if work_queue.qsize() + len(_background_tasks) >= work_queue.maxsize:
+        logger.warning("Async work queue full, rejecting request")
         raise HTTPException(
-            status_code=400, 
+            status_code=503,
             detail={
-                "error": "Invalid callback URL",
-                "message": "Callback URL must use http or https scheme",
-                "code": "INVALID_CALLBACK_URL"
-            }
-        )
-    
-    # Advanced security checks against SSRF attacks
-    from urllib.parse import urlparse
-    import ipaddress
-    
-    try:
-        parsed = urlparse(callback_url_str)
-        
-        # Block dangerous schemes and protocols
-        if parsed.scheme not in ['http', 'https']:
-            raise HTTPException(
-                status_code=400, 
-                detail={
-                    "error": "Invalid URL scheme",
-                    "message": "Only HTTP and HTTPS schemes are allowed",
-                    "code": "INVALID_SCHEME"
-                }
-            )
-        
-        # Environment-based security checks
-        environment = os.getenv('ENVIRONMENT', 'development')
-        
-        if parsed.hostname:
-            # Block internal/localhost addresses in production
-            blocked_hosts = ['localhost', '127.0.0.1', '0.0.0.0', '::1', 'metadata.google.internal']
-            
-            if parsed.hostname.lower() in blocked_hosts and environment == 'production':
-                logger.warning(f"Blocked callback to internal host: {parsed.hostname}")
-                raise HTTPException(
-                    status_code=400, 
-                    detail={
-                        "error": "Callback URL not allowed",
-                        "message": "Callbacks to localhost/internal hosts not allowed in production",
-                        "code": "BLOCKED_HOST"
-                    }
-                )
-            
-            # Block private IP ranges
-            try:
-                ip = ipaddress.ip_address(parsed.hostname)
-                if (ip.is_private or ip.is_loopback) and environment == 'production':
-                    logger.warning(f"Blocked callback to private IP: {ip}")
-                    raise HTTPException(
-                        status_code=400, 
-                        detail={
-                            "error": "Private IP not allowed",
-                            "message": "Callbacks to private IP addresses not allowed in production",
-                            "code": "PRIVATE_IP_BLOCKED"
-                        }
-                    )
-            except ValueError:
-                pass  # Not an IP address, hostname is OK
-            
-            # Block cloud metadata endpoints
-            metadata_domains = [
-                'metadata.google.internal',
-                '169.254.169.254',  # AWS/GCP metadata
-                'metadata.azure.com'
-            ]
-            
-            if parsed.hostname.lower() in metadata_domains:
-                logger.warning(f"Blocked callback to metadata endpoint: {parsed.hostname}")
-                raise HTTPException(
-                    status_code=400, 
-                    detail={
-                        "error": "Metadata endpoint blocked",
-                        "message": "Callbacks to cloud metadata endpoints are not allowed",
-                        "code": "METADATA_BLOCKED"
-                    }
-                )
-    
-    except ValueError as e:
-        logger.warning(f"URL parsing error: {str(e)}")
-        raise HTTPException(
-            status_code=400, 
-            detail={
-                "error": "Malformed URL",
-                "message": "The provided callback URL is malformed",
-                "code": "MALFORMED_URL"
+                "error": "Server busy",
+                "message": "Too many async requests in flight. Please retry shortly.",
+                "code": "QUEUE_FULL"
             }
         )
     
     try:
         # Create request record with enhanced tracking
-        start_time = time.time()
-        logger.info(f"Accepting async request with complexity {request.complexity}")
-        
-        request_id = request_service.create_request_record(
-            db, RequestMode.ASYNC, request.data, callback_url_str
-        )
+        logger.info("Accepting async request with complexity %s", request.complexity)
         
-        # Schedule background processing
-        background_tasks.add_task(
-            callback_service.process_async_callback,
-            SessionLocal,  # Pass session factory
-            request_id
+        # The ID is assigned here so the ack doesn't wait for the batched insert to commit
+        request_id = str(uuid7())
+        task = asyncio.create_task(
+            _persist_and_dispatch(work_queue, request_id, request.data, callback_url_str)
         )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
         
-        accept_time = (time.time() - start_time) * 1000
-        logger.info(f"Async request {request_id} accepted in {accept_time:.2f}ms")
+        accept_time = (time.perf_counter() - http_request.state.started) * 1000
+        logger.info("Async request %s accepted in %.2fms", request_id, accept_time)
         
         return AsyncAckResponse(
             request_id=request_id,
@@ -357,7 +590,7 @@ async def async_endpoint(
         )
         
     except ValueError as e:
-        logger.error(f"Validation error in async processing: {str(e)}")
+        logger.error("Validation error in async processing: %s", e)
         raise HTTPException(
             status_code=400, 
             detail={
@@ -367,7 +600,7 @@ async def async_endpoint(
             }
         )
     except Exception as e:
-        logger.error(f"Unexpected error in async processing: {str(e)}")
+        logger.error("Unexpected error in async processing: %s", e)
         raise HTTPException(
             status_code=500, 
             detail={
@@ -382,13 +615,13 @@ async def async_endpoint(
 async def list_requests(
     mode: Optional[RequestMode] = Query(None, description="Filter by request mode"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of requests to return"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     List recent requests with optional filtering by mode.
     """
     try:
-        requests = request_service.list_requests(db, mode, limit)
+        requests = await request_service.list_requests(db, mode, limit)
         return requests
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve requests: {str(e)}")
@@ -397,13 +630,13 @@ async def list_requests(
 @app.get("/requests/{request_id}", response_model=RequestDetails)
 async def get_request_details(
     request_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get detailed information about a specific request.
     """
     try:
-        request_details = request_service.get_request_details(db, request_id)
+        request_details = await request_service.get_request_details(db, request_id)
         
         if not request_details:
             raise HTTPException(status_code=404, detail="Request not found")
@@ -430,8 +663,54 @@ async def health_check():
     )
 
 
+# /stats request figures are recomputed at most once per TTL, by one caller at a time
+STATS_CACHE_TTL = 3.0
+_stats_cache = {"ts": 0.0, "data": None}
+_stats_lock = asyncio.Lock()
+
+
+async def _query_request_statistics(db: AsyncSession) -> Dict:
+    """Counts and average processing times in one aggregate query"""
+    is_sync = RequestRecord.mode == RequestMode.SYNC
+    is_async = RequestRecord.mode == RequestMode.ASYNC
+    row = (await db.execute(select(
+        func.count().label('total'),
+        func.sum(case((is_sync, 1), else_=0)).label('sync_count'),
+        func.sum(case((is_async, 1), else_=0)).label('async_count'),
+        func.sum(case((RequestRecord.status == RequestStatus.COMPLETED, 1), else_=0)).label('completed'),
+        func.sum(case((RequestRecord.status == RequestStatus.FAILED, 1), else_=0)).label('failed'),
+        func.avg(case((is_sync, RequestRecord.processing_time_ms))).label('sync_avg'),
+        func.avg(case((is_async, RequestRecord.processing_time_ms))).label('async_avg')
+    ).select_from(RequestRecord))).one()
+    
+    total_requests = row.total
+    completed_requests = row.completed or 0
+    return {
+        "total_requests": total_requests,
+        "sync_requests": row.sync_count or 0,
+        "async_requests": row.async_count or 0,
+        "completed_requests": completed_requests,
+        "failed_requests": row.failed or 0,
+        "sync_avg_processing_time_ms": round(row.sync_avg or 0, 2),
+        "async_avg_processing_time_ms": round(row.async_avg or 0, 2),
+        "success_rate": round(completed_requests / total_requests * 100, 2) if total_requests > 0 else 0
+    }
+
+
+async def _cached_request_statistics(db: AsyncSession) -> Dict:
+    """Return cached request statistics, recomputing (single-flight) once the TTL expires"""
+    if _stats_cache["data"] is not None and time.monotonic() - _stats_cache["ts"] < STATS_CACHE_TTL:
+        return _stats_cache["data"]
+    async with _stats_lock:
+        # Another caller may have refreshed the cache while we waited for the lock
+        if _stats_cache["data"] is None or time.monotonic() - _stats_cache["ts"] >= STATS_CACHE_TTL:
+            _stats_cache["data"] = await _query_request_statistics(db)
+            _stats_cache["ts"] = time.monotonic()
+        return _stats_cache["data"]
+
+
 @app.get("/stats")
-async def get_stats(db: Session = Depends(get_db)):
+async def get_stats(db: AsyncSession = Depends(get_db)):
     """
     Get comprehensive statistics about requests and system health.
     
@@ -442,34 +721,8 @@ async def get_stats(db: Session = Depends(get_db)):
     - Circuit breaker status
     """
     try:
-        # Get basic counts
-        from database import RequestRecord
-        
-        total_requests = db.query(RequestRecord).count()
-        sync_requests = db.query(RequestRecord).filter(RequestRecord.mode == RequestMode.SYNC).count()
-        async_requests = db.query(RequestRecord).filter(RequestRecord.mode == RequestMode.ASYNC).count()
-        
-        completed_requests = db.query(RequestRecord).filter(
-            RequestRecord.status == RequestStatus.COMPLETED
-        ).count()
-        
-        failed_requests = db.query(RequestRecord).filter(
-            RequestRecord.status == RequestStatus.FAILED
-        ).count()
-        
-        # Get average processing times
-        sync_avg_time = db.query(RequestRecord).filter(
-            RequestRecord.mode == RequestMode.SYNC,
-            RequestRecord.processing_time_ms.isnot(None)
-        ).with_entities(RequestRecord.processing_time_ms).all()
-        
-        async_avg_time = db.query(RequestRecord).filter(
-            RequestRecord.mode == RequestMode.ASYNC,
-            RequestRecord.processing_time_ms.isnot(None)
-        ).with_entities(RequestRecord.processing_time_ms).all()
-        
-        sync_avg = sum([t[0] for t in sync_avg_time]) / len(sync_avg_time) if sync_avg_time else 0
-        async_avg = sum([t[0] for t in async_avg_time]) / len(async_avg_time) if async_avg_time else 0
+        # Request statistics (served from a short TTL cache)
+        request_statistics = await _cached_request_statistics(db)
         
         # Get rate limiting statistics
         rate_limit_stats = rate_limiter.get_stats()
@@ -481,26 +734,18 @@ async def get_stats(db: Session = Depends(get_db)):
         except AttributeError:
             callback_stats = {"circuit_breaker": "not_available"}
         
-        return {
-            "request_statistics": {
-                "total_requests": total_requests,
-                "sync_requests": sync_requests,
-                "async_requests": async_requests,
-                "completed_requests": completed_requests,
-                "failed_requests": failed_requests,
-                "sync_avg_processing_time_ms": round(sync_avg, 2),
-                "async_avg_processing_time_ms": round(async_avg, 2),
-                "success_rate": round(completed_requests / total_requests * 100, 2) if total_requests > 0 else 0
-            },
+        # Returned as a response object so the dict skips jsonable_encoder
+        return ORJSONResponse({
+            "request_statistics": request_statistics,
             "rate_limiting": rate_limit_stats,
             "callback_service": callback_stats,
             "system": {
                 "uptime_seconds": time.time() - app_start_time,
                 "timestamp": datetime.utcnow().isoformat()
             }
-        }
+        })
     except Exception as e:
-        logger.error(f"Error getting stats: {str(e)}")
+        logger.error("Error getting stats: %s", e)
         raise HTTPException(
             status_code=500, 
             detail={
@@ -522,6 +767,33 @@ async def test_callback(payload: dict):
 
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvicorn[standard] installs uvloop and httptools; fall back where they don't build (e.g. Windows)
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    # Rate limits, circuit breakers and the /stats cache are per process unless they live in Redis
+    # (and the in-memory dev database lives in one process), so only production with Redis
+    # defaults to a worker per CPU
+    shared_state = isinstance(rate_limiter, RedisRateLimiter)
+    default_workers = os.cpu_count() if environment == 'production' and shared_state else 1
+    workers = int(os.getenv("WEB_CONCURRENCY", default_workers))
+    if workers > 1 and not shared_state:
+        logger.warning(
+            "Running %d workers without REDIS_URL: each worker enforces its own rate limit "
+            "(effective limit x%d) and keeps its own circuit breakers", workers, workers
+        )
+    # Spawned workers read this to size their CPU pools (see work_processor.CPU_POOL_WORKERS)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop=loop,
+        http=http,
+        workers=workers,
+        proxy_headers=True,
+        timeout_keep_alive=15
+    )
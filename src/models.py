@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 import uuid
 
 
@@ -20,11 +20,15 @@ class RequestStatus(str, Enum):
 
 
 class WorkRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     data: Dict[str, Any] = Field(..., description="Input data for processing")
     complexity: int = Field(default=1, ge=1, le=10, description="Work complexity level (1-10)")
 
 
 class AsyncWorkRequest(WorkRequest):
+    # HttpUrl normalizes the host (decimal/hex/shorthand IPv4, percent-encoding, trailing dots),
+    # so the endpoint's SSRF checks read callback_url.host instead of parsing the URL again
     callback_url: HttpUrl = Field(..., description="URL to send results to")
 
 
@@ -1,15 +1,50 @@
-import json
 import uuid
 import random
 import time
 import aiohttp
 import asyncio
+import orjson
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from urllib.parse import urlparse
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from database import RequestRecord, get_db
+from cachetools import TTLCache
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import RequestRecord, uuid7, db_writer, db_updater
 from models import RequestMode, RequestStatus, RequestDetails
-from work_processor import WorkProcessor
+from work_processor import WorkProcessor, run_cpu_bound, SYNC_IO_DELAY_PER_COMPLEXITY
+
+try:
+    import redis.asyncio as aioredis  # Optional: circuit-breaker state shared by every uvicorn worker
+except ImportError:
+    aioredis = None
+
+
+# Requests in these states never change again, so their details can be served from memory
+TERMINAL_STATUSES = frozenset({
+    RequestStatus.COMPLETED, RequestStatus.FAILED,
+    RequestStatus.CALLBACK_SENT, RequestStatus.CALLBACK_FAILED
+})
+_details_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)  # request_id -> RequestDetails
+_details_generation = 0  # Bumped on every invalidation so in-flight reads don't re-cache stale rows
+
+
+def _invalidate_details(request_id: str):
+    """Drop a request's cached details after its row changes"""
+    global _details_generation
+    _details_generation += 1
+    _details_cache.pop(request_id, None)
+
+
+# Exactly the columns RequestDetails exposes, selected as plain rows (no ORM identity-map bookkeeping)
+_DETAIL_COLUMNS = (
+    RequestRecord.request_id, RequestRecord.mode, RequestRecord.status,
+    RequestRecord.input_data, RequestRecord.result, RequestRecord.processing_time_ms,
+    RequestRecord.callback_url, RequestRecord.callback_attempts,
+    RequestRecord.created_at, RequestRecord.completed_at, RequestRecord.error_message
+)
 
 
 class RequestService:
@@ -18,127 +53,190 @@ class RequestService:
     def __init__(self):
         self.work_processor = WorkProcessor()
     
-    def create_request_record(self, db: Session, mode: RequestMode, input_data: Dict[str, Any], 
-                            callback_url: Optional[str] = None) -> str:
-        """Create a new request record in database"""
-        request_id = str(uuid.uuid4())
+    async def create_request_record(self, db: AsyncSession, mode: RequestMode, input_data: Dict[str, Any], 
+                            callback_url: Optional[str] = None, request_id: Optional[str] = None,
+                            status: RequestStatus = RequestStatus.PENDING, commit: bool = True,
+                            **fields) -> str:
+        """Create a new request record in database (extra fields, e.g. result, are set on the record)"""
+        request_id = request_id or str(uuid7())
         
         record = RequestRecord(
             request_id=request_id,
             mode=mode,
-            status=RequestStatus.PENDING,
-            input_data=json.dumps(input_data),
-            callback_url=callback_url
+            status=status,
+            input_data=input_data,
+            callback_url=callback_url,
+            **fields
         )
         
         db.add(record)
-        db.commit()
-        db.refresh(record)
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
+        
+        return request_id
+    
+    async def enqueue_request_record(self, mode: RequestMode, input_data: Dict[str, Any],
+                                     callback_url: Optional[str] = None,
+                                     request_id: Optional[str] = None) -> str:
+        """Create a new request record through the batching writer (a repeated request_id is a no-op)"""
+        request_id = request_id or str(uuid7())
+        
+        await db_writer.enqueue({
+            "request_id": request_id,
+            "mode": mode,
+            "status": RequestStatus.PENDING,
+            "input_data": input_data,
+            "callback_url": callback_url,
+            "callback_attempts": 0
+        })
         
         return request_id
     
-    def update_request_status(self, db: Session, request_id: str, 
+    async def update_request_status(self, db: AsyncSession, request_id: str, 
                             status: RequestStatus, result: Optional[Dict[str, Any]] = None,
                             processing_time_ms: Optional[float] = None,
-                            error_message: Optional[str] = None):
-        """Update request status and results"""
-        record = db.query(RequestRecord).filter(RequestRecord.request_id == request_id).first()
+                            error_message: Optional[str] = None, commit: bool = True):
+        """Update request status and results in a single UPDATE (no SELECT first)"""
+        values: Dict[str, Any] = {"status": status}
+        if result:
+            values["result"] = result
+        if processing_time_ms:
+            values["processing_time_ms"] = processing_time_ms
+        if status in [RequestStatus.COMPLETED, RequestStatus.FAILED, RequestStatus.CALLBACK_SENT]:
+            values["completed_at"] = datetime.utcnow()
+        if error_message:
+            values["error_message"] = error_message
         
-        if record:
-            record.status = status
-            if result:
-                record.result = json.dumps(result)
-            if processing_time_ms:
-                record.processing_time_ms = processing_time_ms
-            if status in [RequestStatus.COMPLETED, RequestStatus.FAILED, RequestStatus.CALLBACK_SENT]:
-                record.completed_at = datetime.utcnow()
-            if error_message:
-                record.error_message = error_message
-            
-            db.commit()
+        await db.execute(
+            update(RequestRecord)
+            .where(RequestRecord.request_id == request_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        
+        if commit:
+            await db.commit()
+        _invalidate_details(request_id)
+    
+    def record_persist_failure(self, request_id: str, mode: RequestMode, input_data: Dict[str, Any],
+                               callback_url: Optional[str], error: Exception):
+        """Serve a FAILED status for an acknowledged request whose record could not be written"""
+        now = datetime.utcnow()
+        _details_cache[request_id] = RequestDetails(
+            request_id=request_id,
+            mode=mode,
+            status=RequestStatus.FAILED,
+            input_data=input_data,
+            callback_url=callback_url,
+            created_at=now,
+            completed_at=now,
+            error_message=f"Request could not be persisted: {error}"
+        )
     
-    def get_request_details(self, db: Session, request_id: str) -> Optional[RequestDetails]:
+    async def get_request_details(self, db: AsyncSession, request_id: str) -> Optional[RequestDetails]:
         """Get details for a specific request"""
-        record = db.query(RequestRecord).filter(RequestRecord.request_id == request_id).first()
+        try:
+            uuid.UUID(request_id)
+        except ValueError:
+            return None  # Not a request ID we could have issued
+        
+        cached = _details_cache.get(request_id)
+        if cached is not None:
+            return cached
         
-        if not record:
+        generation = _details_generation
+        row = (await db.execute(select(*_DETAIL_COLUMNS).where(RequestRecord.request_id == request_id))).first()
+        
+        if not row:
             return None
         
-        return RequestDetails(
-            request_id=record.request_id,
-            mode=record.mode,
-            status=record.status,
-            input_data=json.loads(record.input_data),
-            result=json.loads(record.result) if record.result else None,
-            processing_time_ms=record.processing_time_ms,
-            callback_url=record.callback_url,
-            callback_attempts=record.callback_attempts,
-            created_at=record.created_at,
-            completed_at=record.completed_at,
-            error_message=record.error_message
-        )
+        details = RequestDetails.model_construct(**row._mapping)
+        
+        # Skip caching if any row changed while we were reading; this one may now be stale
+        if details.status in TERMINAL_STATUSES and generation == _details_generation:
+            _details_cache[request_id] = details
+        
+        return details
     
-    def list_requests(self, db: Session, mode: Optional[RequestMode] = None, 
+    async def list_requests(self, db: AsyncSession, mode: Optional[RequestMode] = None, 
                      limit: int = 100) -> List[RequestDetails]:
         """List recent requests with optional filtering"""
-        query = db.query(RequestRecord).order_by(RequestRecord.created_at.desc())
+        query = select(*_DETAIL_COLUMNS).order_by(RequestRecord.created_at.desc())
         
         if mode:
-            query = query.filter(RequestRecord.mode == mode)
+            query = query.where(RequestRecord.mode == mode)
         
-        records = query.limit(limit).all()
+        rows = (await db.execute(query.limit(limit))).all()
         
-        return [
-            RequestDetails(
-                request_id=record.request_id,
-                mode=record.mode,
-                status=record.status,
-                input_data=json.loads(record.input_data),
-                result=json.loads(record.result) if record.result else None,
-                processing_time_ms=record.processing_time_ms,
-                callback_url=record.callback_url,
-                callback_attempts=record.callback_attempts,
-                created_at=record.created_at,
-                completed_at=record.completed_at,
-                error_message=record.error_message
-            )
-            for record in records
-        ]
+        # Column types already decode the stored values (orjson JSON, enums, datetimes),
+        # so build the models without re-validating every field of every row
+        return [RequestDetails.model_construct(**row._mapping) for row in rows]
     
-    def process_sync_request(self, db: Session, input_data: Dict[str, Any], 
+    async def process_sync_request(self, db: AsyncSession, input_data: Dict[str, Any], 
                            complexity: int = 1) -> Dict[str, Any]:
-        """Process a synchronous request"""
-        # Create request record
-        request_id = self.create_request_record(db, RequestMode.SYNC, input_data)
+        """Process a synchronous request
+        
+        The caller only learns the request_id from the response, so the pending/processing states
+        are never observable: the record is written once, in its final state, with one commit,
+        and no transaction is held open while the work runs.
+        """
+        request_id = str(uuid7())
+        created_at = datetime.utcnow()
         
         try:
-            # Update status to processing
-            self.update_request_status(db, request_id, RequestStatus.PROCESSING)
+            # Timed from here so processing_time_ms includes the simulated latency, as on the async path
+            start_time = time.perf_counter()
             
-            # Perform the work
-            work_result = self.work_processor.process_work(input_data, complexity)
+            # Simulated I/O latency is awaited here, so a pool worker is only occupied by the CPU work
+            await asyncio.sleep(complexity * SYNC_IO_DELAY_PER_COMPLEXITY)
             
-            # Update with results
-            self.update_request_status(
-                db, request_id, RequestStatus.COMPLETED,
-                result=work_result["result"],
-                processing_time_ms=work_result["processing_time_ms"]
-            )
-            
-            return {
-                "request_id": request_id,
-                "result": work_result["result"],
-                "processing_time_ms": work_result["processing_time_ms"],
-                "timestamp": datetime.utcnow()
-            }
+            # Perform the CPU-bound work in the process pool so it doesn't block the event loop
+            work_result = await run_cpu_bound(self.work_processor.process_work, input_data, complexity)
+            work_result["processing_time_ms"] = (time.perf_counter() - start_time) * 1000
             
         except Exception as e:
-            # Update with error
-            self.update_request_status(
-                db, request_id, RequestStatus.FAILED,
-                error_message=str(e)
+            # Record the failure
+            await self.create_request_record(
+                db, RequestMode.SYNC, input_data, request_id=request_id,
+                status=RequestStatus.FAILED,
+                error_message=str(e),
+                created_at=created_at,
+                completed_at=datetime.utcnow()
             )
             raise e
+        
+        # Record the results; one clock read serves as both completed_at and the response timestamp
+        completed_at = datetime.utcnow()
+        await self.create_request_record(
+            db, RequestMode.SYNC, input_data, request_id=request_id,
+            status=RequestStatus.COMPLETED,
+            result=work_result["result"],
+            processing_time_ms=work_result["processing_time_ms"],
+            created_at=created_at,
+            completed_at=completed_at
+        )
+        
+        return {
+            "request_id": request_id,
+            "result": work_result["result"],
+            "processing_time_ms": work_result["processing_time_ms"],
+            "timestamp": completed_at
+        }
+
+
+@lru_cache(maxsize=4096)
+def _domain_of(url: str) -> str:
+    """netloc of a callback URL, cached since the same webhook URLs recur across requests"""
+    return urlparse(url).netloc
+
+
+@dataclass(slots=True)
+class BreakerEntry:
+    """Circuit-breaker state for one callback domain"""
+    failures: int = 0
+    last_failure: float = 0.0
 
 
 class CallbackService:
@@ -149,43 +247,82 @@ class CallbackService:
         self.retry_delay = 1.0  # seconds
         self.circuit_breaker_threshold = 5  # failures before opening circuit
         self.circuit_breaker_reset_timeout = 60  # seconds
-        self.failed_callbacks: Dict[str, int] = {}  # domain -> failure count
-        self.circuit_breaker_state: Dict[str, float] = {}  # domain -> last_failure_time
+        self._breakers: Dict[str, BreakerEntry] = {}  # domain -> failure count and last failure time
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Shared ClientSession, created on first use, so callbacks reuse pooled keep-alive connections"""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    # Enhanced timeout and connection limits
+                    connector = aiohttp.TCPConnector(
+                        limit=500,           # Max connections overall
+                        limit_per_host=20,   # Max 20 connections per host
+                        ttl_dns_cache=300,   # DNS cache for 5 minutes
+                        use_dns_cache=True,
+                        keepalive_timeout=75
+                    )
+                    
+                    timeout = aiohttp.ClientTimeout(
+                        total=10,      # Total timeout
+                        connect=3,     # Connection timeout
+                        sock_read=5    # Socket read timeout
+                    )
+                    
+                    self._session = aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=timeout,
+                        headers={'User-Agent': 'SyncAsyncAPI/1.0'}
+                    )
+        return self._session
+    
+    async def close(self):
+        """Close the shared ClientSession (called on app shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            await asyncio.sleep(0.25)  # Let SSL transports finish closing before the loop stops
+        self._session = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
     
     def _get_domain(self, url: str) -> str:
         """Extract domain from URL for circuit breaker tracking"""
-        from urllib.parse import urlparse
-        return urlparse(url).netloc
+        return _domain_of(url)
     
-    def _is_circuit_open(self, domain: str) -> bool:
+    async def _is_circuit_open(self, domain: str) -> bool:
         """Check if circuit breaker is open for this domain"""
-        if domain not in self.circuit_breaker_state:
-            return False
-        
-        failure_count = self.failed_callbacks.get(domain, 0)
-        if failure_count < self.circuit_breaker_threshold:
+        return self._local_circuit_open(domain)
+    
+    def _local_circuit_open(self, domain: str) -> bool:
+        """Circuit check against this process's failure counts"""
+        entry = self._breakers.get(domain)
+        if entry is None or entry.failures < self.circuit_breaker_threshold:
             return False
         
         # Check if enough time has passed to reset circuit
-        last_failure = self.circuit_breaker_state[domain]
-        if time.time() - last_failure > self.circuit_breaker_reset_timeout:
-            self.failed_callbacks[domain] = 0
-            del self.circuit_breaker_state[domain]
+        if time.time() - entry.last_failure > self.circuit_breaker_reset_timeout:
+            del self._breakers[domain]
             return False
         
         return True
     
-    def _record_callback_failure(self, domain: str):
+    async def _record_callback_failure(self, domain: str):
         """Record a callback failure for circuit breaker"""
-        self.failed_callbacks[domain] = self.failed_callbacks.get(domain, 0) + 1
-        self.circuit_breaker_state[domain] = time.time()
+        entry = self._breakers.get(domain)
+        if entry is None:
+            entry = self._breakers[domain] = BreakerEntry()
+        entry.failures += 1
+        entry.last_failure = time.time()
     
-    def _record_callback_success(self, domain: str):
+    async def _record_callback_success(self, domain: str):
         """Record a callback success for circuit breaker"""
-        if domain in self.failed_callbacks:
-            del self.failed_callbacks[domain]
-        if domain in self.circuit_breaker_state:
-            del self.circuit_breaker_state[domain]
+        self._breakers.pop(domain, None)
     
     async def send_callback(self, callback_url: str, payload: Dict[str, Any], 
                           request_id: str) -> bool:
@@ -194,51 +331,33 @@ class CallbackService:
         domain = self._get_domain(callback_url)
         
         # Check circuit breaker
-        if self._is_circuit_open(domain):
+        if await self._is_circuit_open(domain):
             print(f"Circuit breaker open for {domain}, skipping callback for request {request_id}")
             return False
         
+        # Built once; each attempt only updates its metadata fields before serializing
+        callback_metadata = {'attempt': 0, 'max_attempts': self.max_retries, 'sent_at': None}
+        enhanced_payload = {**payload, 'callback_metadata': callback_metadata}
+        headers = {"Content-Type": "application/json", "X-Request-Id": request_id}
+        
         for attempt in range(self.max_retries):
             try:
-                # Enhanced timeout and connection limits
-                connector = aiohttp.TCPConnector(
-                    limit_per_host=10,  # Max 10 connections per host
-                    ttl_dns_cache=300,  # DNS cache for 5 minutes
-                    use_dns_cache=True
-                )
+                session = await self._get_session()
                 
-                timeout = aiohttp.ClientTimeout(
-                    total=10,      # Total timeout
-                    connect=3,     # Connection timeout
-                    sock_read=5    # Socket read timeout
-                )
+                callback_metadata['attempt'] = attempt + 1
+                callback_metadata['sent_at'] = datetime.utcnow().isoformat()
                 
-                async with aiohttp.ClientSession(
-                    connector=connector, 
-                    timeout=timeout,
-                    headers={'User-Agent': 'SyncAsyncAPI/1.0'}
-                ) as session:
-                    # Add request ID to payload for tracking
-                    enhanced_payload = {
-                        **payload,
-                        'callback_metadata': {
-                            'attempt': attempt + 1,
-                            'max_attempts': self.max_retries,
-                            'sent_at': datetime.utcnow().isoformat()
-                        }
-                    }
-                    
-                    async with session.post(
-                        callback_url,
-                        json=enhanced_payload,
-                        headers={"Content-Type": "application/json"}
-                    ) as response:
-                        if response.status == 200:
-                            self._record_callback_success(domain)
-                            print(f"Callback successful for request {request_id} on attempt {attempt + 1}")
-                            return True
-                        else:
-                            print(f"Callback failed with status {response.status} for request {request_id} on attempt {attempt + 1}")
+                async with session.post(
+                    callback_url,
+                    data=orjson.dumps(enhanced_payload),  # Serialized with orjson rather than aiohttp's json.dumps
+                    headers=headers
+                ) as response:
+                    if response.status == 200:
+                        await self._record_callback_success(domain)
+                        print(f"Callback successful for request {request_id} on attempt {attempt + 1}")
+                        return True
+                    else:
+                        print(f"Callback failed with status {response.status} for request {request_id} on attempt {attempt + 1}")
                             
             except asyncio.TimeoutError:
                 print(f"Callback timeout for request {request_id} on attempt {attempt + 1}")
@@ -254,81 +373,76 @@ class CallbackService:
                 await asyncio.sleep(delay)
         
         # All attempts failed
-        self._record_callback_failure(domain)
+        await self._record_callback_failure(domain)
         print(f"All callback attempts failed for request {request_id}")
         return False
     
-    async def process_async_callback(self, db_session_factory, request_id: str):
-        """Process async request and send callback"""
-        db = db_session_factory()
+    async def process_async_callback(self, request_id: str, input_data: Dict[str, Any], callback_url: str):
+        """Process async request and send callback (status writes are batched with other requests' by db_updater)
         
+        The endpoint hands over the input and callback URL it just persisted, so the record is never re-read.
+        """
         try:
-            # Get request record
-            record = db.query(RequestRecord).filter(RequestRecord.request_id == request_id).first()
-            
-            if not record:
-                print(f"Request {request_id} not found")
-                return
-            
             # Update status to processing
-            record.status = RequestStatus.PROCESSING
-            db.flush()  # Flush without full commit for better performance
+            await self._write_status(request_id, status=RequestStatus.PROCESSING)
             
             # Perform the work asynchronously
-            input_data = json.loads(record.input_data)
             work_result = await WorkProcessor.process_work_async(input_data, 1)  # Default complexity
             
-            # Update with results in single transaction
-            record.status = RequestStatus.COMPLETED
-            record.result = json.dumps(work_result["result"])
-            record.processing_time_ms = work_result["processing_time_ms"]
-            record.completed_at = datetime.utcnow()
+            # Results are written together with the callback outcome, in one update
+            completed_at = datetime.utcnow()
+            update_values = {
+                "result": work_result["result"],
+                "processing_time_ms": work_result["processing_time_ms"],
+                "completed_at": completed_at
+            }
             
             # Send callback
             callback_payload = {
                 "request_id": request_id,
                 "result": work_result["result"],
                 "processing_time_ms": work_result["processing_time_ms"],
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": completed_at.isoformat()
             }
             
             callback_success = await self.send_callback(
-                record.callback_url, callback_payload, request_id
+                callback_url, callback_payload, request_id
             )
             
             if callback_success:
-                record.status = RequestStatus.CALLBACK_SENT
-                record.callback_attempts = self.max_retries  # Track successful attempt
+                update_values["status"] = RequestStatus.CALLBACK_SENT
+                update_values["callback_attempts"] = self.max_retries  # Track successful attempt
             else:
-                record.status = RequestStatus.CALLBACK_FAILED
-                record.error_message = f"Callback failed after {self.max_retries} attempts"
+                update_values["status"] = RequestStatus.CALLBACK_FAILED
+                update_values["error_message"] = f"Callback failed after {self.max_retries} attempts"
             
-            db.commit()
+            await self._write_status(request_id, **update_values)
             
         except Exception as e:
             # Update with error
-            record.status = RequestStatus.FAILED
-            record.error_message = str(e)
-            record.completed_at = datetime.utcnow()
-            db.commit()
+            await self._write_status(
+                request_id, status=RequestStatus.FAILED,
+                error_message=str(e), completed_at=datetime.utcnow()
+            )
             print(f"Error processing async request {request_id}: {str(e)}")
-        
-        finally:
-            db.close()
+    
+    @staticmethod
+    async def _write_status(request_id: str, **values):
+        """Queue an update for the batched writer, wait for its commit, then drop any cached details"""
+        await db_updater.enqueue({"request_id": request_id, **values})
+        _invalidate_details(request_id)
     
     def get_circuit_breaker_stats(self) -> Dict[str, Any]:
         """Get circuit breaker statistics for monitoring"""
         stats = {}
         
-        for domain in set(list(self.failed_callbacks.keys()) + list(self.circuit_breaker_state.keys())):
-            failure_count = self.failed_callbacks.get(domain, 0)
-            last_failure = self.circuit_breaker_state.get(domain, 0)
-            is_open = self._is_circuit_open(domain)
+        for domain, entry in list(self._breakers.items()):  # Copied: the open check may drop expired entries
+            is_open = self._local_circuit_open(domain)
             
             stats[domain] = {
                 "state": "open" if is_open else "closed",
-                "failure_count": failure_count,
-                "last_failure_time": last_failure,
+                "failure_count": entry.failures,
+                "last_failure_time": entry.last_failure,
                 "circuit_open": is_open
             }
         
@@ -340,4 +454,68 @@ class CallbackService:
                 "circuit_threshold": self.circuit_breaker_threshold,
                 "reset_timeout": self.circuit_breaker_reset_timeout
             }
-        }
\ No newline at end of file
+        }
+
+
+class RedisCallbackService(CallbackService):
+    """
+    Callback service whose circuit-breaker failure counts live in Redis, shared across worker processes.
+    
+    Each domain's count is one key that expires reset_timeout after its last failure, so a circuit
+    closes again on its own. Open/closed answers are cached in-process for a second; if Redis is
+    unreachable the in-process breaker state is used instead.
+    """
+    
+    def __init__(self, redis_url: str):
+        super().__init__()
+        self.client = aioredis.from_url(redis_url)
+        self._open_cache: TTLCache = TTLCache(maxsize=4096, ttl=1)  # domain -> circuit open?
+    
+    @staticmethod
+    def _failures_key(domain: str) -> str:
+        return f"cb:{domain}:failures"
+    
+    async def _is_circuit_open(self, domain: str) -> bool:
+        """Check if circuit breaker is open for this domain"""
+        is_open = self._open_cache.get(domain)
+        if is_open is not None:
+            return is_open
+        try:
+            failures = await self.client.get(self._failures_key(domain))
+        except aioredis.RedisError as e:
+            print(f"Redis circuit breaker unavailable, using in-process state: {e}")
+            return await super()._is_circuit_open(domain)
+        is_open = failures is not None and int(failures) >= self.circuit_breaker_threshold
+        self._open_cache[domain] = is_open
+        return is_open
+    
+    async def _record_callback_failure(self, domain: str):
+        """Record a callback failure for circuit breaker"""
+        self._open_cache.pop(domain, None)
+        key = self._failures_key(domain)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                await pipe.incr(key).expire(key, self.circuit_breaker_reset_timeout).execute()
+        except aioredis.RedisError as e:
+            print(f"Redis circuit breaker unavailable, using in-process state: {e}")
+            await super()._record_callback_failure(domain)
+    
+    async def _record_callback_success(self, domain: str):
+        """Record a callback success for circuit breaker"""
+        self._open_cache.pop(domain, None)
+        await super()._record_callback_success(domain)
+        try:
+            await self.client.delete(self._failures_key(domain))
+        except aioredis.RedisError as e:
+            print(f"Redis circuit breaker unavailable, using in-process state: {e}")
+    
+    def get_circuit_breaker_stats(self) -> Dict[str, Any]:
+        """Get circuit breaker statistics (domains listed are only this process's fallback state)"""
+        stats = super().get_circuit_breaker_stats()
+        stats["global_stats"]["backend"] = "redis"
+        return stats
+    
+    async def close(self):
+        """Close the shared ClientSession and the Redis client (called on app shutdown)"""
+        await super().close()
+        await self.client.aclose()
\ No newline at end of file
@@ -1,10 +1,188 @@
 import asyncio
-import json
+import hashlib
 import math
+import multiprocessing
+import os
 import random
+import re
 import time
-from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Annotated, Callable, Dict, Any, Optional
 from datetime import datetime
+import numpy as np
+import orjson
+from pydantic import AfterValidator, Field, TypeAdapter, ValidationError
+
+try:
+    import hyperscan  # Optional: every suspicious pattern matched in one DFA pass
+except ImportError:
+    hyperscan = None
+
+try:
+    from numba import njit  # Optional: compiles the work loop to native code
+except ImportError:
+    njit = None
+
+
+# Input validation rules, compiled once into a single pydantic-core validator
+MAX_INPUT_BYTES = 10000  # 10KB limit on the serialized payload
+MAX_INPUT_DEPTH = 10
+SUSPICIOUS_PATTERNS = (rb'<script', rb'javascript:', rb'eval\(', rb'exec\(')
+SUSPICIOUS_RE = re.compile(b'|'.join(SUSPICIOUS_PATTERNS), re.IGNORECASE)
+
+if hyperscan is not None:
+    _SUSPICIOUS_DB = hyperscan.Database()
+    _SUSPICIOUS_DB.compile(
+        expressions=list(SUSPICIOUS_PATTERNS),
+        ids=list(range(len(SUSPICIOUS_PATTERNS))),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(SUSPICIOUS_PATTERNS)
+    )
+    
+    def _stop_on_match(pattern_id, start, end, flags, context):
+        return True  # Any hit decides the outcome, so end the scan
+    
+    def _has_suspicious(data: bytes) -> bool:
+        try:
+            _SUSPICIOUS_DB.scan(data, match_event_handler=_stop_on_match)
+        except hyperscan.ScanTerminated:
+            return True
+        return False
+else:
+    def _has_suspicious(data: bytes) -> bool:
+        return SUSPICIOUS_RE.search(data) is not None
+
+
+def _within_depth(root, max_depth: int = MAX_INPUT_DEPTH) -> bool:
+    """Prevent deeply nested objects that could cause stack overflow (explicit stack, no recursion)"""
+    stack = [(root, 0)]
+    while stack:
+        obj, depth = stack.pop()
+        if depth > max_depth:
+            return False
+        if isinstance(obj, dict):
+            stack.extend((v, depth + 1) for v in obj.values())
+        elif isinstance(obj, list):
+            stack.extend((item, depth + 1) for item in obj)
+    return True
+
+
+def _check_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Size, depth and suspicious-pattern rules applied after the structural checks"""
+    try:
+        data_bytes = orjson.dumps(data)
+    except TypeError:
+        raise ValueError("Input is not JSON serializable")
+    if len(data_bytes) > MAX_INPUT_BYTES:
+        raise ValueError("Input too large")
+    if not _within_depth(data):
+        raise ValueError("Input nested too deeply")
+    if _has_suspicious(data_bytes):
+        raise ValueError("Input contains suspicious patterns")
+    return data
+
+
+# Non-empty object (strict: no coercion from other types) followed by the payload rules
+INPUT_VALIDATOR = TypeAdapter(
+    Annotated[Dict[str, Any], Field(min_length=1, strict=True), AfterValidator(_check_payload)]
+)
+
+
+def _stable_hash(data: bytes) -> int:
+    """Signed 64-bit digest that, unlike hash(), is the same in every process (pool workers included)"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big', signed=True)
+
+
+def _canonical_hash(data: Dict[str, Any]) -> int:
+    """Stable hash of the payload's key-sorted JSON encoding, shared by the sync and async paths"""
+    return _stable_hash(orjson.dumps(data, option=orjson.OPT_SORT_KEYS))
+
+
+def _work_terms(input_hash: int, iterations: int) -> np.ndarray:
+    """sin(input_hash + i) * cos(i) for every iteration, computed with vectorized ufuncs"""
+    offsets = np.arange(iterations, dtype=np.int64)
+    # Summed in int64 then converted, so each angle is float(input_hash + i) as in a scalar loop
+    angles = (offsets + np.int64(input_hash)).astype(np.float64)
+    return np.sin(angles) * np.cos(offsets.astype(np.float64))
+
+
+def _accumulate(result_value: float, terms) -> float:
+    """Loop-carried part of the work: add each term, then fold the total back through sqrt"""
+    sqrt = math.sqrt
+    for term in terms:
+        result_value += term
+        result_value = sqrt(abs(result_value)) if result_value != 0 else 1
+    return result_value
+
+
+if njit is not None:
+    # Eagerly compiled (explicit signature, cached on disk) as each pool worker imports this module,
+    # so no request pays the JIT
+    @njit("float64(int64, int64)", cache=True, nogil=True)
+    def _compute(input_hash, iterations):
+        result_value = 0.0
+        for i in range(iterations):
+            result_value += math.sin(input_hash + i) * math.cos(i)
+            result_value = math.sqrt(abs(result_value)) if result_value != 0 else 1.0
+        return result_value
+else:
+    def _compute(input_hash: int, iterations: int) -> float:
+        return _accumulate(0, _work_terms(input_hash, iterations).tolist())
+
+
+# Simulated I/O latency per complexity level on the sync path (awaited on the API side, not in the pool)
+SYNC_IO_DELAY_PER_COMPLEXITY = 0.01
+
+# CPU-bound work runs in worker processes so it never holds the API process's GIL. Every web worker
+# (WEB_CONCURRENCY) starts its own pool, so the default splits the CPUs between them instead of
+# spawning cpu_count pool processes per web worker
+_WEB_WORKERS = max(1, int(os.getenv('WEB_CONCURRENCY', 1)))
+CPU_POOL_WORKERS = int(os.getenv('CPU_POOL_WORKERS', max(1, (os.cpu_count() or 1) // _WEB_WORKERS)))
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_cpu_pool() -> ProcessPoolExecutor:
+    global _cpu_pool
+    if _cpu_pool is None:
+        # spawn (not fork) because the API process already runs threads (aiosqlite, executors)
+        _cpu_pool = ProcessPoolExecutor(
+            max_workers=CPU_POOL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _cpu_pool
+
+
+async def run_cpu_bound(fn: Callable, *args):
+    """Run fn(*args) in the CPU process pool without blocking the event loop"""
+    global _cpu_pool
+    pool = _get_cpu_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); start a fresh pool for later calls
+        if _cpu_pool is pool:
+            _cpu_pool = None
+            pool.shutdown(wait=False)
+        raise
+
+
+async def start_cpu_pool():
+    """Spawn and warm every CPU pool worker (called on app startup)
+    
+    One trivial task per worker, submitted together, makes the pool start all of its processes
+    and import this module in each, so the first requests don't pay process startup.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_cpu_pool()
+    await asyncio.gather(*(loop.run_in_executor(pool, _compute, 0, 1) for _ in range(CPU_POOL_WORKERS)))
+
+
+def shutdown_cpu_pool():
+    """Stop the CPU process pool (called on app shutdown)"""
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
 
 
 class WorkProcessor:
@@ -18,6 +196,10 @@ class WorkProcessor:
         """
         Performs deterministic work based on input data and complexity.
         
+        Runs in the CPU process pool, so it does CPU work only; the sync path's simulated
+        I/O latency (SYNC_IO_DELAY_PER_COMPLEXITY) is awaited by the caller beforehand, and
+        the caller's processing_time_ms covers both.
+        
         Args:
             data: Input data dictionary
             complexity: Work complexity level (1-10), affects processing time
@@ -27,24 +209,12 @@ class WorkProcessor:
         """
         start_time = time.perf_counter()
         
-        # Simulate work based on complexity
-        work_duration = complexity * 0.1  # Base duration in seconds
-        
         # Deterministic computation based on input data
-        input_hash = hash(json.dumps(data, sort_keys=True))
+        input_hash = _canonical_hash(data)
         
         # Simulate CPU work with mathematical operations
-        result_value = 0
         iterations = complexity * 1000
-        
-        for i in range(iterations):
-            # Deterministic but computationally expensive operations
-            result_value += math.sin(input_hash + i) * math.cos(i)
-            result_value = math.sqrt(abs(result_value)) if result_value != 0 else 1
-            
-            # Add some actual delay to simulate real work
-            if i % 100 == 0:
-                time.sleep(0.001)  # 1ms delay every 100 iterations
+        result_value = _compute(input_hash, iterations)
         
         # Generate deterministic but complex result
         processed_result = {
@@ -55,7 +225,7 @@ class WorkProcessor:
             "processing_metadata": {
                 "timestamp": datetime.utcnow().isoformat(),
                 "iterations_performed": iterations,
-                "deterministic_hash": abs(hash(str(result_value))) % 1000000
+                "deterministic_hash": abs(_stable_hash(str(result_value).encode())) % 1000000
             }
         }
         
@@ -81,24 +251,15 @@ class WorkProcessor:
         """
         start_time = time.perf_counter()
         
-        # Simulate work based on complexity
-        work_duration = complexity * 0.1
+        # Simulated non-blocking I/O latency (20ms per complexity level), awaited once up front
+        await asyncio.sleep(complexity * 0.02)
         
         # Deterministic computation based on input data
-        input_hash = hash(json.dumps(data, sort_keys=True))
+        input_hash = _canonical_hash(data)
         
-        # Simulate async CPU work with mathematical operations
-        result_value = 0
+        # Simulate async CPU work with mathematical operations, off the event loop
         iterations = complexity * 1000
-        
-        for i in range(iterations):
-            # Deterministic but computationally expensive operations
-            result_value += math.sin(input_hash + i) * math.cos(i)
-            result_value = math.sqrt(abs(result_value)) if result_value != 0 else 1
-            
-            # Yield control to event loop periodically
-            if i % 50 == 0:
-                await asyncio.sleep(0.001)  # Non-blocking delay
+        result_value = await run_cpu_bound(_compute, input_hash, iterations)
         
         # Generate deterministic but complex result
         processed_result = {
@@ -109,7 +270,7 @@ class WorkProcessor:
             "processing_metadata": {
                 "timestamp": datetime.utcnow().isoformat(),
                 "iterations_performed": iterations,
-                "deterministic_hash": abs(hash(str(result_value))) % 1000000
+                "deterministic_hash": abs(_stable_hash(str(result_value).encode())) % 1000000
             }
         }
         
@@ -132,39 +293,8 @@ class WorkProcessor:
         Returns:
             True if valid, False otherwise
         """
-        if not isinstance(data, dict):
-            return False
-        
-        # Must have at least one key
-        if len(data) == 0:
-            return False
-        
-        # Check for reasonable data size (prevent abuse)
         try:
-            data_str = json.dumps(data)
-        except (TypeError, ValueError):
-            return False
-            
-        if len(data_str) > 10000:  # 10KB limit
-            return False
-        
-        # Prevent deeply nested objects that could cause stack overflow
-        def check_depth(obj, current_depth=0, max_depth=10):
-            if current_depth > max_depth:
-                return False
-            if isinstance(obj, dict):
-                return all(check_depth(v, current_depth + 1, max_depth) for v in obj.values())
-            elif isinstance(obj, list):
-                return all(check_depth(item, current_depth + 1, max_depth) for item in obj)
-            return True
-        
-        if not check_depth(data):
-            return False
-        
-        # Check for suspicious patterns
-        data_str_lower = data_str.lower()
-        suspicious_patterns = ['<script', 'javascript:', 'eval(', 'exec(']
-        if any(pattern in data_str_lower for pattern in suspicious_patterns):
+            INPUT_VALIDATOR.validate_python(data)
+        except ValidationError:
             return False
-        
         return True
\ No newline at end of file